@@ -0,0 +1,195 @@
+"""
+Benchmarks for graph_engine and the graph_service cache.
+
+Run from backend/:
+    python -m benchmarks.bench_graph --out bench.json
+    python -m benchmarks.bench_graph --quick --out new.json --compare bench.json
+
+Results are JSON: one record per (engine, generator, size, operation, mastery ratio)
+with the best-of-N wall time and, for construction, the tracemalloc peak.
+--compare exits non-zero when any operation is slower than --threshold times the baseline.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from graph_engine.dag import ConceptGraph
+from graph_engine.compact import CompactConceptGraph
+from graph_engine.unlock_state import UnlockState
+from benchmarks.generators import GENERATORS, mastered_prefix
+
+ENGINES = {"dict": ConceptGraph, "compact": CompactConceptGraph}
+SIZES   = [10, 100, 1000, 10000, 100000]
+RATIOS  = [0.0, 0.25, 0.5, 0.9]
+SIZE_LIMITS = {"random_dense": 10000, "wide_fan_in": 20000}   # edge counts explode past these
+
+def _best_of(fn, budget: float = 0.5, repeats: int = 5, sample: float = 0.002) -> float:
+    """
+    Best per-call wall time over `repeats` samples. Fast calls are looped so each
+    sample lasts at least `sample` seconds (like timeit.autorange); slow ones stop
+    early once `budget` seconds are spent.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= sample:
+            break
+        number *= 10
+    best, spent = elapsed / number, elapsed
+    for _ in range(repeats - 1):
+        if spent >= budget:
+            break
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        best, spent = min(best, elapsed / number), spent + elapsed
+    return best
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_engine(engine_name: str, gen_name: str, n: int, seed: int) -> list:
+    Engine = ENGINES[engine_name]
+    concepts, edges = GENERATORS[gen_name](n, seed=seed)
+    base = {"suite": "engine", "engine": engine_name, "graph": gen_name, "n": n, "edges": len(edges)}
+
+    records = [
+        {**base, "op": "construct", "seconds": _best_of(lambda: Engine(concepts, edges)),
+         "peak_bytes": _peak_bytes(lambda: Engine(concepts, edges))},
+    ]
+    g = Engine(concepts, edges)
+    records.append({**base, "op": "is_valid_dag",     "seconds": _best_of(g.is_valid_dag)})
+    records.append({**base, "op": "topological_sort", "seconds": _best_of(g.topological_sort)})
+
+    order = g.topological_sort()
+    for ratio in RATIOS:
+        mastered = mastered_prefix(order, ratio, seed)
+        records.append({**base, "op": "get_unlocked", "ratio": ratio,
+                        "seconds": _best_of(lambda: g.get_unlocked(mastered))})
+        records.append({**base, "op": "get_frontier", "ratio": ratio,
+                        "seconds": _best_of(lambda: g.get_frontier(mastered))})
+
+    mastered = mastered_prefix(order, 0.5, seed)
+    state = UnlockState(g, mastered)
+    toggles = order[len(order) // 2:][:1000]
+    def toggle_all():
+        for node in toggles:
+            state.set_mastered(node, True)
+        for node in toggles:
+            state.set_mastered(node, False)
+    records.append({**base, "op": "unlock_state_toggle", "ratio": 0.5,
+                    "seconds": _best_of(toggle_all) / max(1, 2 * len(toggles))})
+    return records
+
+def bench_service(gen_name: str, n: int, seed: int) -> list:
+    """graph_cache hit vs miss. Needs the backend's dependencies to import; skipped otherwise."""
+    try:
+        from services.graph_cache import GraphCache
+    except ImportError as e:
+        return [{"suite": "service", "graph": gen_name, "n": n, "skipped": str(e)}]
+
+    data = GENERATORS[gen_name](n, seed=seed)
+    base = {"suite": "service", "graph": gen_name, "n": n, "edges": len(data[1])}
+    cold = GraphCache(loader=lambda topic_id: data)
+    def miss():
+        cold.clear()
+        cold.get(1)
+    warm = GraphCache(loader=lambda topic_id: data)
+    warm.get(1)
+    return [
+        {**base, "op": "cache_miss", "seconds": _best_of(miss)},
+        {**base, "op": "cache_hit",  "seconds": _best_of(lambda: warm.get(1))},
+    ]
+
+def run(sizes: list, generators: list, engines: list, seed: int) -> list:
+    records = []
+    for gen_name in generators:
+        for n in sizes:
+            if n > SIZE_LIMITS.get(gen_name, n):
+                continue
+            for engine_name in engines:
+                print(f"  {gen_name:<14} n={n:<7} {engine_name}", file=sys.stderr)
+                records += bench_engine(engine_name, gen_name, n, seed)
+            records += bench_service(gen_name, n, seed)
+    return records
+
+def _key(r: dict) -> tuple:
+    return (r["suite"], r.get("engine"), r["graph"], r["n"], r.get("op"), r.get("ratio"))
+
+def compare(baseline: list, current: list, threshold: float, floor: float = 1e-5) -> list:
+    """Records in `current` slower than threshold x their baseline counterpart (ignoring sub-`floor` timings)."""
+    old = {_key(r): r for r in baseline if "seconds" in r}
+    regressions = []
+    for r in current:
+        before = old.get(_key(r))
+        if before and "seconds" in r and max(before["seconds"], r["seconds"]) >= floor:
+            ratio = r["seconds"] / before["seconds"]
+            if ratio > threshold:
+                regressions.append({**r, "baseline_seconds": before["seconds"], "slowdown": round(ratio, 2)})
+    return regressions
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--quick", action="store_true", help="sizes up to 1000 only")
+    parser.add_argument("--graphs", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON from a previous run")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    sizes = [n for n in args.sizes if n <= 1000] if args.quick else args.sizes
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit":    _git_commit(),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "seed":      args.seed,
+        },
+        "results": run(sizes, args.graphs, args.engines, args.seed),
+    }
+
+    payload = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(baseline, results["results"], args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r.get('engine') or r['suite']} {r['graph']} n={r['n']} {r['op']}"
+                  f"{'' if r.get('ratio') is None else ' ratio=' + str(r['ratio'])}: "
+                  f"{r['baseline_seconds']:.6f}s -> {r['seconds']:.6f}s (x{r['slowdown']})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
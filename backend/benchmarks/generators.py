@@ -0,0 +1,68 @@
+"""
+Seeded synthetic DAG generators for the graph engine benchmarks.
+Every generator returns (concepts, edges) in the shape ConceptGraph takes,
+with edges always pointing from a lower to a higher id so the result is acyclic.
+"""
+import random
+
+def _concepts(n: int) -> dict:
+    return {i: f"c{i}" for i in range(1, n + 1)}
+
+def layered(n: int, seed: int = 0, layers: int = None, fan_in: int = 3):
+    """Curriculum-like: nodes in layers, each takes up to fan_in prerequisites from the layer above."""
+    rng = random.Random(seed)
+    layers = layers or max(2, round(n ** 0.5))
+    width = max(1, n // layers)
+    edges = []
+    for i in range(width + 1, n + 1):
+        layer_start = ((i - 1) // width) * width + 1
+        above = range(max(1, layer_start - width), layer_start)
+        for p in rng.sample(above, min(fan_in, len(above))):
+            edges.append((p, i))
+    return _concepts(n), edges
+
+def deep_chain(n: int, seed: int = 0, shortcut_p: float = 0.1):
+    """One long prerequisite chain with occasional skip edges — worst case for recursion depth."""
+    rng = random.Random(seed)
+    edges = [(i, i + 1) for i in range(1, n)]
+    edges += [(i, rng.randint(i + 2, n)) for i in range(1, n - 1) if rng.random() < shortcut_p]
+    return _concepts(n), edges
+
+def wide_fan_in(n: int, seed: int = 0, sinks: int = 5):
+    """Most concepts are roots feeding a handful of capstones — huge in-degrees."""
+    rng = random.Random(seed)
+    sinks = min(sinks, max(1, n // 2))
+    roots = n - sinks
+    edges = [(r, s) for s in range(roots + 1, n + 1) for r in range(1, roots + 1) if rng.random() < 0.8]
+    return _concepts(n), edges
+
+def random_sparse(n: int, seed: int = 0, avg_degree: float = 2.0):
+    rng = random.Random(seed)
+    edges = set()
+    for _ in range(int(n * avg_degree)):
+        a, b = rng.randint(1, n), rng.randint(1, n)
+        if a != b:
+            edges.add((min(a, b), max(a, b)))
+    return _concepts(n), sorted(edges)
+
+def random_dense(n: int, seed: int = 0, avg_degree: float = 25.0):
+    """Like random_sparse but with a much higher average degree (capped at a complete DAG)."""
+    return random_sparse(n, seed, min(avg_degree, (n - 1) / 2))
+
+GENERATORS = {
+    "layered":       layered,
+    "deep_chain":    deep_chain,
+    "wide_fan_in":   wide_fan_in,
+    "random_sparse": random_sparse,
+    "random_dense":  random_dense,
+}
+
+def mastered_prefix(order: list, ratio: float, seed: int = 0) -> set:
+    """A plausible mastery set: mostly a prefix of the learning order with some noise."""
+    rng = random.Random(seed)
+    k = int(len(order) * ratio)
+    mastered = set(order[:k])
+    for node in order[k:k + k // 10]:
+        if rng.random() < 0.5:
+            mastered.add(node)
+    return mastered
@@ -1,13 +1,308 @@
+import aiomysql
+import asyncio
 import mysql.connector
 import os
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from queue import LifoQueue, Empty, Full
 from dotenv import load_dotenv
 
+from metrics import record_acquire, record_query, register, Gauge
+
 load_dotenv()
 
-def get_connection():
+POOL_SIZE      = int(os.getenv("DB_POOL_SIZE", 10))
+POOL_OVERFLOW  = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))
+POOL_TIMEOUT   = float(os.getenv("DB_POOL_TIMEOUT", 30))
+POOL_RECYCLE   = int(os.getenv("DB_POOL_RECYCLE", 3600))     # seconds, 0 disables
+POOL_PRE_PING  = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+def _connect():
     return mysql.connector.connect(
         host=os.getenv("DB_HOST"),
+        port=int(os.getenv("DB_PORT", 3306)),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         database=os.getenv("DB_NAME")
-    )
\ No newline at end of file
+    )
+
+async def _create_async_pool(maxsize: int, recycle: int):
+    return await aiomysql.create_pool(
+        host=os.getenv("DB_HOST"),
+        port=int(os.getenv("DB_PORT", 3306)),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        db=os.getenv("DB_NAME"),
+        minsize=0,
+        maxsize=maxsize,
+        pool_recycle=recycle or -1,
+        autocommit=False,
+    )
+
+class PoolTimeout(Exception):
+    pass
+
+class PooledConnection:
+    """
+    Proxy around a raw connection checked out of the pool.
+    close() hands the connection back instead of disconnecting, so repository
+    code keeps its usual cursor / commit / close pattern.
+    """
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw  = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._raw.cursor(*args, **kwargs))
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+class CountingCursor:
+    """Cursor proxy that counts statements for the metrics endpoint."""
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def execute(self, *args, **kwargs):
+        record_query()
+        return self._raw.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        record_query()
+        return self._raw.executemany(*args, **kwargs)
+
+class ConnectionPool:
+    """
+    Thread-safe pool: `size` connections are kept idle, up to `max_overflow`
+    more are opened under load and closed when returned. Connections older
+    than `recycle` seconds are replaced, and `pre_ping` checks liveness on checkout.
+    """
+    def __init__(self, size=POOL_SIZE, max_overflow=POOL_OVERFLOW, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, pre_ping=POOL_PRE_PING, connect=_connect):
+        self.size         = size
+        self.max_overflow = max_overflow
+        self.timeout      = timeout
+        self.recycle      = recycle
+        self.pre_ping     = pre_ping
+        self._connect     = connect
+        self._idle        = LifoQueue(maxsize=size)   # (raw, created_at); LIFO keeps hot connections hot
+        self._slots       = threading.BoundedSemaphore(size + max_overflow)
+        self._lock        = threading.Lock()
+        self._born        = {}                        # id(raw) -> created_at
+        self.checked_out  = 0
+
+    def acquire(self) -> PooledConnection:
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            record_acquire(time.perf_counter() - start)
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+        try:
+            raw = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        finally:
+            record_acquire(time.perf_counter() - start)
+        with self._lock:
+            self.checked_out += 1
+        return PooledConnection(self, raw)
+
+    def _checkout(self):
+        while True:
+            try:
+                raw, born = self._idle.get_nowait()
+            except Empty:
+                return self._open()
+            if self.recycle and time.monotonic() - born > self.recycle:
+                self._discard(raw)
+                continue
+            if self.pre_ping and not self._alive(raw):
+                self._discard(raw)
+                continue
+            return raw
+
+    def _open(self):
+        raw = self._connect()
+        with self._lock:
+            self._born[id(raw)] = time.monotonic()
+        return raw
+
+    def _alive(self, raw) -> bool:
+        try:
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    def _discard(self, raw):
+        with self._lock:
+            self._born.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def release(self, raw):
+        with self._lock:
+            self.checked_out -= 1
+            born = self._born.get(id(raw), 0)
+        try:
+            # Never hand the next caller an open transaction (or its stale snapshot)
+            if raw.in_transaction:
+                raw.rollback()
+            self._idle.put_nowait((raw, born))
+        except Full:
+            self._discard(raw)           # overflow connection
+        except Exception:
+            self._discard(raw)           # broken connection
+        finally:
+            self._slots.release()
+
+    def dispose(self):
+        while True:
+            try:
+                raw, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            self._discard(raw)
+
+    def stats(self) -> dict:
+        return {
+            "size":         self.size,
+            "max_overflow": self.max_overflow,
+            "idle":         self._idle.qsize(),
+            "checked_out":  self.checked_out,
+        }
+
+pool = ConnectionPool()
+
+register(Gauge("db_pool_connections", "Pooled connections by state", ("state",),
+               lambda: {("idle",): pool._idle.qsize(), ("checked_out",): pool.checked_out}))
+
+def get_connection():
+    return pool.acquire()
+
+@contextmanager
+def connection(conn=None):
+    """
+    Yields `conn` when the caller already holds one (e.g. one transaction
+    spanning several repository calls), otherwise checks one out and returns it on exit.
+    """
+    if conn is not None:
+        yield conn
+        return
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+class AsyncConnectionPool:
+    """
+    aiomysql pool for async routes, opened on first use inside the running
+    event loop. Waiting for a connection suspends the request instead of
+    holding a worker thread. aiomysql keeps every connection it opens, so
+    size + max_overflow is simply the cap; idle connections are checked for
+    EOF and `recycle` on checkout.
+    """
+    def __init__(self, size=POOL_SIZE, max_overflow=POOL_OVERFLOW, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, create=_create_async_pool):
+        self.size         = size
+        self.max_overflow = max_overflow
+        self.timeout      = timeout
+        self.recycle      = recycle
+        self._create      = create
+        self._pool        = None
+        self._opening     = None              # asyncio.Lock, made inside the loop
+        self.checked_out  = 0
+
+    async def _open(self):
+        if self._pool is None:
+            if self._opening is None:
+                self._opening = asyncio.Lock()
+            async with self._opening:
+                if self._pool is None:
+                    self._pool = await self._create(self.size + self.max_overflow, self.recycle)
+        return self._pool
+
+    async def acquire(self):
+        pool = await self._open()
+        start = time.perf_counter()
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"No database connection available after {self.timeout}s") from None
+        finally:
+            record_acquire(time.perf_counter() - start)
+        self.checked_out += 1
+        return conn
+
+    async def release(self, conn):
+        self.checked_out -= 1
+        try:
+            if not conn.closed and conn.get_transaction_status():
+                await conn.rollback()
+        except Exception:
+            conn.close()                  # broken connection; the pool drops closed ones
+        self._pool.release(conn)
+
+    async def dispose(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "size":         self.size,
+            "max_overflow": self.max_overflow,
+            "idle":         self._pool.freesize if self._pool is not None else 0,
+            "checked_out":  self.checked_out,
+        }
+
+async_pool = AsyncConnectionPool()
+
+register(Gauge("db_async_pool_connections", "Async pooled connections by state", ("state",),
+               lambda: {("idle",): async_pool.stats()["idle"], ("checked_out",): async_pool.checked_out}))
+
+@asynccontextmanager
+async def async_connection(conn=None):
+    """connection() for async code: reuses `conn` or checks one out of the async pool."""
+    if conn is not None:
+        yield conn
+        return
+    conn = await async_pool.acquire()
+    try:
+        yield conn
+    finally:
+        await async_pool.release(conn)
+
+async def fetch_all(conn, sql: str, params=(), dictionary: bool = False) -> list:
+    """Runs one statement on an async connection and returns every row."""
+    async with conn.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor) as cursor:
+        record_query()
+        await cursor.execute(sql, params)
+        return list(await cursor.fetchall())
+
+async def fetch_one(conn, sql: str, params=(), dictionary: bool = False):
+    rows = await fetch_all(conn, sql, params, dictionary)
+    return rows[0] if rows else None
+
+async def execute(conn, sql: str, params=()) -> int:
+    """Runs one write statement on an async connection and commits it; returns lastrowid."""
+    async with conn.cursor() as cursor:
+        record_query()
+        await cursor.execute(sql, params)
+        await conn.commit()
+        return cursor.lastrowid
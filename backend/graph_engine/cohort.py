@@ -0,0 +1,86 @@
+def _set_bits(x: int):
+    """Yields the positions of the set bits of x, lowest first. O(popcount)"""
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+class Cohort:
+    """
+    Mastery of many learners on one topic as a bit matrix.
+
+    Each learner is a row and each concept a column; the matrix is stored
+    column-major as one Python int per concept (bit r = learner r mastered it).
+    Unlocked / frontier for every learner then come from a few bitwise ops per
+    edge — O(E * users / 64) word operations, with no per-learner Python loop.
+    Unlike ConceptGraph.get_unlocked, concepts without prerequisites count as
+    unlocked for every learner who has not mastered them: they can always be started.
+
+    graph: anything with `concepts` and `prerequisites(node)` (ConceptGraph, CompactConceptGraph)
+    """
+    def __init__(self, graph):
+        self.graph    = graph
+        self.user_ids = []
+        self.rows     = {}                             # user_id -> row
+        self.mastered = dict.fromkeys(graph.concepts, 0)
+        self._unlocked = self._frontier = None
+
+    def add(self, user_id: int, concept_id: int = None, mastered: bool = True):
+        """Feeds one progress row. Learners with no mastered concepts still count."""
+        row = self.rows.get(user_id)
+        if row is None:
+            row = self.rows[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        if mastered and concept_id in self.mastered:
+            self.mastered[concept_id] |= 1 << row
+        self._unlocked = self._frontier = None
+
+    def _evaluate(self):
+        if self._unlocked is not None:
+            return
+        everyone = (1 << len(self.user_ids)) - 1
+        self._unlocked, self._frontier = {}, {}
+        for node, done in self.mastered.items():
+            prereqs = self.graph.prerequisites(node)
+            if not prereqs:
+                self._unlocked[node], self._frontier[node] = everyone & ~done, 0
+                continue
+            missing_one = missing_two = 0          # learners missing >= 1 / >= 2 prerequisites
+            for p in prereqs:
+                missing = everyone & ~self.mastered.get(p, 0)
+                missing_two |= missing_one & missing
+                missing_one |= missing
+            open_ = everyone & ~done
+            self._unlocked[node] = open_ & ~missing_one
+            self._frontier[node] = open_ & missing_one & ~missing_two
+
+    def histogram(self) -> dict:
+        """Per concept: how many learners have it mastered, unlocked, one away (frontier) or locked."""
+        self._evaluate()
+        total = len(self.user_ids)
+        hist = {}
+        for node, done in self.mastered.items():
+            m = done.bit_count()
+            u = self._unlocked[node].bit_count()
+            f = self._frontier[node].bit_count()
+            hist[node] = {"mastered": m, "unlocked": u, "frontier": f, "locked": total - m - u - f}
+        return hist
+
+    def progress(self) -> dict:
+        """user_id -> percentage of the topic mastered."""
+        counts = [0] * len(self.user_ids)
+        for done in self.mastered.values():
+            for row in _set_bits(done):
+                counts[row] += 1
+        n = len(self.mastered) or 1
+        return {uid: round(100 * c / n, 1) for uid, c in zip(self.user_ids, counts)}
+
+    def per_user(self) -> dict:
+        """user_id -> {unlocked, frontier}. Cost is proportional to the size of the output."""
+        self._evaluate()
+        result = {uid: {"unlocked": [], "frontier": []} for uid in self.user_ids}
+        for key, column in (("unlocked", self._unlocked), ("frontier", self._frontier)):
+            for node, bits in column.items():
+                for row in _set_bits(bits):
+                    result[self.user_ids[row]][key].append(node)
+        return result
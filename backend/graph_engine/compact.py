@@ -0,0 +1,149 @@
+from array import array
+from collections import deque
+from itertools import accumulate
+
+def _csr(n: int, rows: list, cols: list) -> tuple:
+    """Groups cols by row into offset / target arrays; keeps input order within a row. O(V+E)"""
+    counts = [0] * n
+    for r in rows:
+        counts[r] += 1
+    offsets = array("l", accumulate(counts, initial=0))
+    targets = array("l", [0]) * len(cols)
+    fill = list(offsets[:-1])
+    for r, c in zip(rows, cols):
+        targets[fill[r]] = c
+        fill[r] += 1
+    return offsets, targets
+
+class CompactConceptGraph:
+    """
+    Drop-in alternative to ConceptGraph for large topics.
+
+    Concept ids are mapped to dense indices (in `concepts` order) and forward /
+    reverse adjacency are stored as CSR offset + target arrays, which keeps
+    large curricula small in memory. Edges touching unknown concepts are ignored.
+    """
+    def __init__(self, concepts: dict, edges: list):
+        """
+        concepts: {id: name}
+        edges: [(from_id, to_id)]
+        """
+        self.concepts = concepts
+        self.edges    = edges
+        self.ids      = array("q", concepts) if concepts else array("q")
+        self.index    = {cid: i for i, cid in enumerate(concepts)}
+
+        src, dst = [], []
+        for f, t in edges:
+            i, j = self.index.get(f), self.index.get(t)
+            if i is not None and j is not None:
+                src.append(i)
+                dst.append(j)
+        n = len(self.ids)
+        self.fwd_offsets, self.fwd_targets = _csr(n, src, dst)
+        self.rev_offsets, self.rev_targets = _csr(n, dst, src)
+        rev = self.rev_offsets
+        self.in_degree = array("l", [rev[i + 1] - rev[i] for i in range(n)])
+
+    def _mastered_mask(self, mastered_ids: set) -> bytearray:
+        """One byte per dense index, 1 where the concept is mastered."""
+        mask = bytearray(len(self.ids))
+        for m in mastered_ids:
+            i = self.index.get(m)
+            if i is not None:
+                mask[i] = 1
+        return mask
+
+    def _select(self, mastered_ids: set, wanted: int) -> list:
+        """Unmastered concepts with prerequisites, of which exactly `wanted` are unmastered. O(V+E)"""
+        mask = self._mastered_mask(mastered_ids)
+        offs, sources = self.rev_offsets, self.rev_targets
+        result = []
+        for i, cid in enumerate(self.ids):
+            start, end = offs[i], offs[i + 1]
+            if mask[i] or start == end:
+                continue
+            unmastered = 0
+            for p in sources[start:end]:
+                if not mask[p]:
+                    unmastered += 1
+            if unmastered == wanted:
+                result.append(cid)
+        return result
+
+    def prerequisites(self, node) -> list:
+        i = self.index.get(node)
+        if i is None:
+            return []
+        return [self.ids[j] for j in self.rev_targets[self.rev_offsets[i]:self.rev_offsets[i + 1]]]
+
+    def dependents(self, node) -> list:
+        i = self.index.get(node)
+        if i is None:
+            return []
+        return [self.ids[j] for j in self.fwd_targets[self.fwd_offsets[i]:self.fwd_offsets[i + 1]]]
+
+    def _kahn(self) -> tuple:
+        """One Kahn pass over the CSR arrays. Returns (dense order, remaining in-degrees)."""
+        indeg = array("l", self.in_degree)
+        offs, targets = self.fwd_offsets, self.fwd_targets
+        queue = deque(i for i, d in enumerate(indeg) if d == 0)
+        order = []
+
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in targets[offs[i]:offs[i + 1]]:
+                indeg[j] -= 1
+                if indeg[j] == 0:
+                    queue.append(j)
+
+        return order, indeg
+
+    def is_valid_dag(self) -> bool:
+        """A DAG iff Kahn's pass reaches every concept. O(V+E)"""
+        return len(self._kahn()[0]) == len(self.ids)
+
+    def find_cycle(self):
+        """One cycle as [a, b, ..., a] in prerequisite order, or None. Same walk as ConceptGraph."""
+        order, indeg = self._kahn()
+        if len(order) == len(self.ids):
+            return None
+
+        i = next(k for k, d in enumerate(indeg) if d > 0)
+        offs, sources = self.rev_offsets, self.rev_targets
+        seen, walk = {}, []
+        while i not in seen:
+            seen[i] = len(walk)
+            walk.append(i)
+            i = next(p for p in sources[offs[i]:offs[i + 1]] if indeg[p] > 0)
+        cycle = [self.ids[k] for k in walk[seen[i]:][::-1]]
+        cycle = cycle[-1:] + cycle[:-1]
+        return cycle + [cycle[0]]
+
+    def dangling_edges(self) -> list:
+        """Edges whose endpoints are not in `concepts` (ignored by the arrays)."""
+        return [(f, t) for f, t in self.edges if f not in self.index or t not in self.index]
+
+    def validate(self) -> dict:
+        cycle = self.find_cycle()
+        return {
+            "is_valid_dag":   cycle is None,
+            "cycle":          cycle,
+            "dangling_edges": self.dangling_edges(),
+        }
+
+    def topological_sort(self) -> list:
+        """Kahn's Algorithm over the CSR arrays. Same order as ConceptGraph. O(V+E)"""
+        return [self.ids[i] for i in self._kahn()[0]]
+
+    def get_frontier(self, mastered_ids: set) -> list:
+        """
+        Concepts where exactly ONE prerequisite is still unmastered.
+        These are closest to being unlocked. O(V+E)
+        """
+        return self._select(mastered_ids, 1)
+
+    def get_unlocked(self, mastered_ids: set) -> list:
+        """Concepts where ALL prerequisites are mastered but not the concept itself."""
+        return self._select(mastered_ids, 0)
@@ -17,31 +17,21 @@ class ConceptGraph:
             self.reverse[t].append(f)
             self.in_degree[t] += 1
 
-    def is_valid_dag(self) -> bool:
-        """Cycle detection via DFS with recursion stack. O(V+E)"""
-        visited, rec_stack = set(), set()
+    def prerequisites(self, node) -> list:
+        return self.reverse.get(node, [])
 
-        def dfs(node):
-            visited.add(node)
-            rec_stack.add(node)
-            for neighbor in self.graph[node]:
-                if neighbor not in visited:
-                    if dfs(neighbor): return True
-                elif neighbor in rec_stack:
-                    return True
-            rec_stack.discard(node)
-            return False
-
-        return not any(
-            dfs(n) for n in self.concepts
-            if n not in visited
-        )
+    def dependents(self, node) -> list:
+        return self.graph.get(node, [])
 
-    def topological_sort(self) -> list:
-        """Kahn's Algorithm. Returns concept IDs in valid learning order. O(V+E)"""
+    def _kahn(self) -> tuple:
+        """
+        One Kahn pass over the known concepts; edges touching unknown ids are skipped.
+        Returns (order, indeg) — nodes left with indeg > 0 sit on or behind a cycle.
+        """
         indeg = {n: 0 for n in self.concepts}
         for f, t in self.edges:
-            indeg[t] += 1
+            if f in indeg and t in indeg:
+                indeg[t] += 1
 
         queue = deque([n for n in self.concepts if indeg[n] == 0])
         order = []
@@ -50,11 +40,54 @@ class ConceptGraph:
             node = queue.popleft()
             order.append(node)
             for neighbor in self.graph[node]:
+                if neighbor not in indeg:
+                    continue
                 indeg[neighbor] -= 1
                 if indeg[neighbor] == 0:
                     queue.append(neighbor)
 
-        return order
+        return order, indeg
+
+    def is_valid_dag(self) -> bool:
+        """No cycle among the known concepts. Iterative, O(V+E)"""
+        return self.find_cycle() is None
+
+    def find_cycle(self):
+        """
+        Returns one cycle as [a, b, ..., a] (prerequisite order), or None.
+        Every node Kahn could not emit has an unemitted prerequisite, so walking
+        prerequisites from any of them must revisit a node. O(V+E), no recursion.
+        """
+        order, indeg = self._kahn()
+        if len(order) == len(self.concepts):
+            return None
+
+        node = next(n for n in self.concepts if indeg[n] > 0)
+        seen, walk = {}, []
+        while node not in seen:
+            seen[node] = len(walk)
+            walk.append(node)
+            node = next(p for p in self.reverse[node] if indeg.get(p, 0) > 0)
+        cycle = walk[seen[node]:][::-1]
+        cycle = cycle[-1:] + cycle[:-1]       # start at the node the walk closed on
+        return cycle + [cycle[0]]
+
+    def dangling_edges(self) -> list:
+        """Edges whose endpoints are not in `concepts`."""
+        return [(f, t) for f, t in self.edges if f not in self.concepts or t not in self.concepts]
+
+    def validate(self) -> dict:
+        cycle    = self.find_cycle()
+        dangling = self.dangling_edges()
+        return {
+            "is_valid_dag":   cycle is None,
+            "cycle":          cycle,
+            "dangling_edges": dangling,
+        }
+
+    def topological_sort(self) -> list:
+        """Kahn's Algorithm. Returns concept IDs in valid learning order. O(V+E)"""
+        return self._kahn()[0]
 
     def get_frontier(self, mastered_ids: set) -> list:
         """
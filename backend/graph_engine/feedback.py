@@ -0,0 +1,79 @@
+from collections import defaultdict, deque
+
+def _greedy_order(nodes: list, edges: list) -> list:
+    """
+    Eades-Lin-Smyth ordering: peel sinks to the back and sources to the front;
+    when neither is left, move the node with the largest out - in degree to the
+    front. Edges pointing backwards in the result form a feedback edge set.
+    O(V^2 + E), meant for generated roadmaps of tens to hundreds of concepts.
+    """
+    out, inc = defaultdict(set), defaultdict(set)
+    for f, t in edges:
+        out[f].add(t)
+        inc[t].add(f)
+
+    remaining = set(nodes)
+    front, back = [], []
+
+    def remove(n):
+        remaining.discard(n)
+        for t in out[n]:
+            inc[t].discard(n)
+        for f in inc[n]:
+            out[f].discard(n)
+
+    while remaining:
+        changed = True
+        while changed:
+            changed = False
+            for n in [n for n in nodes if n in remaining and not out[n]]:
+                back.append(n)
+                remove(n)
+                changed = True
+            for n in [n for n in nodes if n in remaining and not inc[n]]:
+                front.append(n)
+                remove(n)
+                changed = True
+        if remaining:
+            n = max((n for n in nodes if n in remaining), key=lambda n: len(out[n]) - len(inc[n]))
+            front.append(n)
+            remove(n)
+    return front + back[::-1]
+
+def _reaches(adjacency: dict, start, goal) -> bool:
+    seen, queue = {start}, deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == goal:
+            return True
+        for m in adjacency[node]:
+            if m not in seen:
+                seen.add(m)
+                queue.append(m)
+    return False
+
+def feedback_edges(concepts: dict, edges: list) -> list:
+    """
+    Edges whose removal leaves the known concepts acyclic, in input order.
+    The set is minimal: putting back any one of them recreates a cycle.
+    Self-loops are always included; edges touching unknown ids are ignored.
+    """
+    nodes = list(concepts)
+    known = [(f, t) for f, t in edges if f in concepts and t in concepts]
+    rank  = {n: i for i, n in enumerate(_greedy_order(nodes, [(f, t) for f, t in known if f != t]))}
+
+    kept = defaultdict(list)
+    candidates = []
+    for f, t in known:
+        if rank[f] < rank[t]:
+            kept[f].append(t)
+        else:
+            candidates.append((f, t))
+
+    removed = []
+    for f, t in candidates:                          # put back every edge that no longer closes a cycle
+        if f != t and not _reaches(kept, t, f):
+            kept[f].append(t)
+        else:
+            removed.append((f, t))
+    return removed
@@ -0,0 +1,97 @@
+NODE_WIDTH, NODE_HEIGHT, GAP_X, GAP_Y = 192, 50, 48, 90   # matches the frontend node style
+
+def longest_path_layers(graph, order: list) -> dict:
+    """
+    Layer of each concept = length of the longest prerequisite chain above it,
+    so every edge points strictly downwards. One pass over `order` (topological).
+    Concepts missing from `order` (on or behind a cycle) go to layer 0.
+    """
+    layer = dict.fromkeys(graph.concepts, 0)
+    for node in order:
+        prereqs = graph.prerequisites(node)
+        if prereqs:
+            layer[node] = 1 + max(layer[p] for p in prereqs)
+    return layer
+
+def _count_inversions(seq: list, size: int) -> int:
+    """Pairs i < j with seq[i] > seq[j], values in range(size). Fenwick tree, O(n log size)."""
+    tree, seen, inversions = [0] * (size + 1), 0, 0
+    for v in seq:
+        i, not_greater = v + 1, 0
+        while i:
+            not_greater += tree[i]
+            i -= i & -i
+        inversions += seen - not_greater
+        i = v + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+        seen += 1
+    return inversions
+
+def count_crossings(graph, rows: list) -> int:
+    """Edge crossings between adjacent layers for the given per-layer orderings."""
+    total = 0
+    for upper, lower in zip(rows, rows[1:]):
+        pos = {n: i for i, n in enumerate(lower)}
+        targets = []
+        for n in upper:                                   # upper already in position order
+            targets.extend(sorted(pos[d] for d in graph.dependents(n) if d in pos))
+        total += _count_inversions(targets, len(lower))
+    return total
+
+def _sweep(rows: list, layer: dict, neighbours, reverse: bool):
+    """
+    One barycenter pass: reorder each layer by the mean relative position
+    (rank / width) of its neighbours in the adjacent, already-placed layer.
+    Concepts without such neighbours keep their relative position.
+    """
+    rel  = {}
+    step = 1 if reverse else -1                            # where the placed layer is
+    indices = range(len(rows) - 1, -1, -1) if reverse else range(len(rows))
+    for li in indices:
+        row = rows[li]
+        width = max(1, len(row) - 1)
+        keys = {}
+        for i, n in enumerate(row):
+            placed = [rel[m] for m in neighbours(n) if m in rel and layer[m] == li + step]
+            keys[n] = (sum(placed) / len(placed) if placed else i / width, i)
+        row.sort(key=keys.__getitem__)
+        for i, n in enumerate(row):
+            rel[n] = i / width
+
+def hierarchical_layout(graph, order: list, sweeps: int = 6) -> dict:
+    """
+    Sugiyama-style layout without dummy nodes: longest-path layering, then
+    alternating downward / upward barycenter sweeps, keeping the ordering with
+    the fewest crossings between adjacent layers. Edges that skip layers are
+    not routed and do not count as crossings.
+
+    Returns {"positions": {id: {"x", "y"}}, "layers": int, "crossings": int}.
+    """
+    layer = longest_path_layers(graph, order)
+    rank  = {n: i for i, n in enumerate(order)}
+    depth = 1 + max(layer.values(), default=-1)
+    rows  = [[] for _ in range(depth)]
+    for n in sorted(layer, key=lambda n: rank.get(n, len(rank))):
+        rows[layer[n]].append(n)
+
+    best, best_crossings = [r[:] for r in rows], count_crossings(graph, rows)
+    for i in range(2 * sweeps):
+        if best_crossings == 0:
+            break
+        if i % 2 == 0:
+            _sweep(rows, layer, graph.prerequisites, reverse=False)
+        else:
+            _sweep(rows, layer, graph.dependents, reverse=True)
+        crossings = count_crossings(graph, rows)
+        if crossings < best_crossings:
+            best, best_crossings = [r[:] for r in rows], crossings
+
+    positions = {}
+    for li, row in enumerate(best):
+        span = len(row) * NODE_WIDTH + (len(row) - 1) * GAP_X
+        for i, n in enumerate(row):
+            positions[n] = {"x": i * (NODE_WIDTH + GAP_X) - span / 2 + NODE_WIDTH / 2,
+                            "y": li * (NODE_HEIGHT + GAP_Y)}
+    return {"positions": positions, "layers": depth, "crossings": best_crossings}
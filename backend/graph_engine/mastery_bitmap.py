@@ -0,0 +1,36 @@
+import zlib
+from array import array
+
+class MasteryBitmap:
+    """
+    Packs one learner's mastered set on a topic into bytes: bit i is the
+    concept with the i-th smallest id. Concepts only ever get larger ids, so
+    adding concepts to a topic keeps existing bits in place.
+
+    `fingerprint` (crc32 of the sorted ids) identifies the layout a bitmap was
+    built against; a stored bitmap with another fingerprint must be rebuilt.
+    """
+    def __init__(self, concept_ids):
+        self.ids   = sorted(concept_ids)
+        self.index = {c: i for i, c in enumerate(self.ids)}
+        self.fingerprint = zlib.crc32(array("q", self.ids).tobytes())
+
+    def encode(self, mastered) -> bytes:
+        buf, index = bytearray((len(self.ids) + 7) // 8), self.index
+        for c in mastered:
+            i = index.get(c)
+            if i is not None:
+                buf[i >> 3] |= 1 << (i & 7)
+        return bytes(buf)
+
+    def decode(self, blob: bytes) -> list:
+        ids, n, out = self.ids, len(self.ids), []
+        for byte_index, byte in enumerate(blob):
+            base = byte_index << 3
+            while byte:
+                low = byte & -byte
+                i = base + low.bit_length() - 1
+                if i < n:
+                    out.append(ids[i])
+                byte ^= low
+        return out
@@ -0,0 +1,38 @@
+from math import log2
+
+DEFAULT_DIFFICULTY = 3                 # concepts without a difficulty level count as mid-range
+
+def learnable(state) -> list:
+    """Unmastered concepts whose prerequisites are all mastered, including unmastered roots."""
+    return [n for n, missing in state.missing.items() if missing == 0 and n not in state.mastered]
+
+def rank_next(state, index, difficulty: dict = None, limit: int = 5,
+              w_complete: float = 2.0, w_downstream: float = 1.0, w_difficulty: float = 0.5) -> list:
+    """
+    Orders the concepts a learner can start now, best first.
+
+    state:      UnlockState for the learner (mastered set and missing-prerequisite counts)
+    index:      ReachabilityIndex of the same graph
+    difficulty: {concept_id: 1..5}; missing entries count as DEFAULT_DIFFICULTY
+
+    score = w_complete   * frontier concepts this one completes (it is their last missing prerequisite)
+          + w_downstream * log2(1 + unmastered concepts that transitively depend on it)
+          - w_difficulty * (difficulty - 1)
+
+    Ties go to the concept earlier in learning order. Returns dicts with the
+    score and its parts; `completes` lists the completed concepts' ids.
+    """
+    difficulty = difficulty or {}
+    candidates = learnable(state)
+    downstream = index.descendant_counts(candidates, state.mastered)
+    rank = index.rank
+    scored = []
+    for n in candidates:
+        completes = [d for d in dict.fromkeys(state.graph.dependents(n))
+                     if state.missing.get(d) == 1 and d not in state.mastered]
+        level = difficulty.get(n) or DEFAULT_DIFFICULTY
+        score = w_complete * len(completes) + w_downstream * log2(1 + downstream[n]) - w_difficulty * (level - 1)
+        scored.append({"id": n, "score": round(score, 4), "completes": completes,
+                       "downstream": downstream[n], "difficulty": level})
+    scored.sort(key=lambda c: (-c["score"], rank.get(c["id"], len(rank))))
+    return scored[:limit]
@@ -0,0 +1,113 @@
+from collections import deque
+
+class ReachabilityIndex:
+    """
+    Transitive closure of a topic graph as one int bitset per concept.
+    Bit i stands for the concept at position i of the topological order, so
+    set bits read from low to high are already in learning order.
+
+    Built once per compiled graph in O(V * V/64) word operations; queries walk
+    only the set bits of the answer. Concepts on or behind a cycle are absent
+    from the order and have no ancestors or descendants. Above `max_nodes`
+    concepts no bitsets are kept and queries fall back to a graph walk.
+    """
+    def __init__(self, graph, order: list, max_nodes: int = 2000):
+        self.graph = graph
+        self.order = order
+        self.rank  = {n: i for i, n in enumerate(order)}
+        self._ancestors = self._descendants = None
+        if len(order) <= max_nodes:
+            self._build()
+
+    def _build(self):
+        rank, n = self.rank, len(self.order)
+        anc = [0] * n
+        for i, node in enumerate(self.order):         # prerequisites come first in the order
+            bits = 0
+            for p in self.graph.prerequisites(node):
+                j = rank[p]
+                bits |= anc[j] | (1 << j)
+            anc[i] = bits
+        desc = [0] * n
+        for i in range(n - 1, -1, -1):
+            bits = 0
+            for d in self.graph.dependents(self.order[i]):
+                j = rank.get(d)
+                if j is not None:                     # dependents on a cycle are not ordered
+                    bits |= desc[j] | (1 << j)
+            desc[i] = bits
+        self._ancestors, self._descendants = anc, desc
+
+    def _mask(self, ids) -> int:
+        buf, rank = bytearray((len(self.order) + 7) // 8), self.rank
+        for c in ids:
+            i = rank.get(c)
+            if i is not None:
+                buf[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(buf, "little")
+
+    def _ids(self, bits: int) -> list:
+        order, out = self.order, []
+        while bits:
+            low = bits & -bits
+            out.append(order[low.bit_length() - 1])
+            bits ^= low
+        return out
+
+    def _walk(self, node, step) -> list:
+        """Fallback without bitsets: BFS over `step` neighbours, returned in learning order."""
+        seen, queue = {node}, deque([node])
+        while queue:
+            for m in step(queue.popleft()):
+                if m not in seen and m in self.rank:
+                    seen.add(m)
+                    queue.append(m)
+        seen.discard(node)
+        return sorted(seen, key=self.rank.__getitem__)
+
+    def ancestors(self, node) -> list:
+        """Every concept `node` transitively requires, in learning order."""
+        i = self.rank.get(node)
+        if i is None:
+            return []
+        if self._ancestors is None:
+            return self._walk(node, self.graph.prerequisites)
+        return self._ids(self._ancestors[i])
+
+    def descendants(self, node) -> list:
+        """Every concept that transitively requires `node`, in learning order."""
+        i = self.rank.get(node)
+        if i is None:
+            return []
+        if self._descendants is None:
+            return self._walk(node, self.graph.dependents)
+        return self._ids(self._descendants[i])
+
+    def descendant_count(self, node, mastered_ids=()) -> int:
+        """How many concepts mastering `node` eventually helps unlock, not counting `mastered_ids`."""
+        return self.descendant_counts([node], mastered_ids)[node]
+
+    def descendant_counts(self, nodes, mastered_ids=()) -> dict:
+        """descendant_count for many nodes, masking `mastered_ids` once."""
+        if self._descendants is None:
+            return {n: sum(1 for d in self._walk(n, self.graph.dependents) if d not in mastered_ids)
+                    if n in self.rank else 0 for n in nodes}
+        keep = ~self._mask(mastered_ids) if mastered_ids else -1
+        desc, rank = self._descendants, self.rank
+        return {n: (desc[rank[n]] & keep).bit_count() if n in rank else 0 for n in nodes}
+
+    def path_to(self, target, mastered_ids: set) -> list:
+        """
+        Unmastered prerequisites of `target` in learning order, then `target`
+        itself unless it is mastered. Empty for concepts on a cycle.
+        """
+        i = self.rank.get(target)
+        if i is None:
+            return []
+        if self._ancestors is None:
+            path = [a for a in self._walk(target, self.graph.prerequisites) if a not in mastered_ids]
+        else:
+            path = self._ids(self._ancestors[i] & ~self._mask(mastered_ids))
+        if target not in mastered_ids:
+            path.append(target)
+        return path
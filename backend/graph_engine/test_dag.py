@@ -1,4 +1,13 @@
 from dag import ConceptGraph
+from unlock_state import UnlockState
+from compact import CompactConceptGraph
+from cohort import Cohort
+from mastery_bitmap import MasteryBitmap
+from layout import hierarchical_layout, longest_path_layers
+from reachability import ReachabilityIndex
+from feedback import feedback_edges
+from ranking import rank_next, learnable
+import random
 
 print("Running tests...\n")
 
@@ -17,6 +26,12 @@ print("Basic graph tests passed")
 cycle_edges = [(1, 2), (2, 3), (3, 1)]
 g2 = ConceptGraph(concepts, cycle_edges)
 assert g2.is_valid_dag() == False, "Should detect cycle"
+assert g2.find_cycle() == [1, 2, 3, 1], "Reports the offending cycle"
+assert ConceptGraph(concepts, [(1, 2), (2, 2)]).find_cycle() == [2, 2], "Self-loop is a cycle"
+report = ConceptGraph(concepts, edges + [(3, 42)]).validate()
+assert report["is_valid_dag"] and report["dangling_edges"] == [(3, 42)], "Unknown endpoints are reported, not fatal"
+chain = ConceptGraph(dict.fromkeys(range(100000), ""), [(i, i + 1) for i in range(99999)] + [(99999, 50000)])
+assert chain.find_cycle()[0] == 50000 and len(chain.find_cycle()) == 50001, "Deep chains need no recursion"
 print(" Cycle detection works")
 
 # Empty progress
@@ -24,4 +39,125 @@ g3 = ConceptGraph(concepts, edges)
 assert g3.get_unlocked(set()) == [], "Nothing unlocked with no progress"
 print("Empty progress works")
 
+# Incremental unlock state agrees with full rescans after every toggle
+g4 = ConceptGraph({1: "A", 2: "B", 3: "C", 4: "D"}, [(1, 2), (2, 3), (1, 3), (3, 4)])
+state = UnlockState(g4, set())
+delta = state.set_mastered(1, True)
+assert delta["unlocked_added"] == [2] and delta["frontier_added"] == [3], "Mastering A unlocks B, C one away"
+for node, mastered in [(2, True), (3, True), (2, False), (1, False), (4, True)]:
+    state.set_mastered(node, mastered)
+    assert state.get_unlocked() == sorted(g4.get_unlocked(state.mastered)), "Unlocked out of sync"
+    assert state.get_frontier() == sorted(g4.get_frontier(state.mastered)), "Frontier out of sync"
+assert state.set_mastered(4, True) == state.set_mastered(99, True), "Repeat and unknown toggles are no-ops"
+for engine in (ConceptGraph, CompactConceptGraph):
+    state = UnlockState(engine({1: "a", 2: "b"}, [(1, 2), (1, 99)]), set())
+    assert state.set_mastered(1, True)["unlocked_added"] == [2], "Dangling dependents are skipped"
+    assert state.set_mastered(1, False)["unlocked_removed"] == [2]
+print("Incremental unlock state works")
+
+# Compact engine matches ConceptGraph
+c = CompactConceptGraph(concepts, edges)
+assert c.is_valid_dag() and c.topological_sort() == g.topological_sort(), "Same learning order"
+assert c.get_unlocked({1}) == [2] and c.get_frontier({1}) == [3], "Same unlocked / frontier"
+assert not CompactConceptGraph(concepts, cycle_edges).is_valid_dag(), "Compact detects cycle"
+assert CompactConceptGraph(concepts, cycle_edges).find_cycle() == g2.find_cycle(), "Compact reports same cycle"
+assert CompactConceptGraph(concepts, edges + [(3, 42)]).validate() == report, "Compact validate matches"
+assert CompactConceptGraph({}, []).get_unlocked(set()) == [], "Empty graph"
+rng = random.Random(7)
+ids = list(range(100, 160))
+dag_edges = [(a, b) for a in ids for b in ids if a < b and rng.random() < 0.08]
+ref, cmp_ = ConceptGraph(dict.fromkeys(ids, ""), dag_edges), CompactConceptGraph(dict.fromkeys(ids, ""), dag_edges)
+assert cmp_.topological_sort() == ref.topological_sort(), "Same order on random DAG"
+for ratio in (0.0, 0.3, 0.7, 1.0):
+    m = {i for i in ids if rng.random() < ratio}
+    assert cmp_.get_unlocked(m) == ref.get_unlocked(m) and cmp_.get_frontier(m) == ref.get_frontier(m), "Random DAG mismatch"
+    assert UnlockState(cmp_, m).get_unlocked() == sorted(ref.get_unlocked(m)), "UnlockState runs on compact engine"
+print("Compact engine works")
+
+# Cohort evaluation matches per-user passes
+cohort = Cohort(ref)
+masteries = {uid: {i for i in ids if rng.random() < uid / 20} for uid in range(20)}
+for uid, m in masteries.items():
+    cohort.add(uid)
+    for i in m:
+        cohort.add(uid, i)
+per_user, hist = cohort.per_user(), cohort.histogram()
+roots = {i for i in ids if not ref.prerequisites(i)}
+for uid, m in masteries.items():
+    assert sorted(per_user[uid]["unlocked"]) == sorted(ref.get_unlocked(m) + list(roots - m)), "Cohort unlocked mismatch"
+    assert sorted(per_user[uid]["frontier"]) == sorted(ref.get_frontier(m)), "Cohort frontier mismatch"
+assert sum(h["frontier"] for h in hist.values()) == sum(len(ref.get_frontier(m)) for m in masteries.values())
+assert all(hist[r]["locked"] == 0 for r in roots), "Roots are never locked"
+assert cohort.progress()[0] == 0.0, "Learner with no mastery has 0%"
+print("Cohort evaluation works")
+
+# Mastery bitmap round-trips and survives appended concepts
+codec = MasteryBitmap(ids)
+for m in masteries.values():
+    assert sorted(codec.decode(codec.encode(m | {999}))) == sorted(m), "Bitmap round trip"
+grown = MasteryBitmap(ids + [500, 501])
+assert sorted(grown.decode(codec.encode(masteries[10]))) == sorted(masteries[10]), "Old bitmap decodes after growth"
+assert grown.fingerprint != codec.fingerprint and MasteryBitmap(reversed(ids)).fingerprint == codec.fingerprint
+assert MasteryBitmap([]).encode({1}) == b"" and MasteryBitmap([]).decode(b"") == []
+print("Mastery bitmap works")
+
+# Layout: edges point downwards, crossings are removed where possible
+layer = longest_path_layers(ref, ref.topological_sort())
+assert all(layer[f] < layer[t] for f, t in dag_edges), "Longest-path layering"
+crossed = ConceptGraph({1: "a", 2: "b", 3: "c", 4: "d"}, [(1, 4), (2, 3)])
+result = hierarchical_layout(crossed, crossed.topological_sort())
+assert result["crossings"] == 0 and result["layers"] == 2, "Crossing removed"
+assert result["positions"][4]["x"] < result["positions"][3]["x"], "d placed under a"
+assert hierarchical_layout(cmp_, cmp_.topological_sort()) == hierarchical_layout(ref, ref.topological_sort())
+assert hierarchical_layout(ConceptGraph({}, []), [])["positions"] == {}
+print("Layout works")
+
+# Reachability: bitset index matches a brute-force closure and the graph-walk fallback
+order = ref.topological_sort()
+index, walk = ReachabilityIndex(ref, order), ReachabilityIndex(cmp_, cmp_.topological_sort(), max_nodes=0)
+m = masteries[7]
+for node in ids:
+    stack, closure = list(ref.prerequisites(node)), set()
+    while stack:
+        p = stack.pop()
+        if p not in closure:
+            closure.add(p)
+            stack.extend(ref.prerequisites(p))
+    assert index.ancestors(node) == walk.ancestors(node) == [n for n in order if n in closure], "Ancestors in learning order"
+    assert index.descendants(node) == walk.descendants(node), "Descendants match fallback"
+    assert index.descendant_count(node) == walk.descendant_count(node) == len(index.descendants(node))
+    expected = [n for n in order if n in closure - m] + ([node] if node not in m else [])
+    assert index.path_to(node, m) == walk.path_to(node, m) == expected, "Remaining path to target"
+cyclic = ReachabilityIndex(ConceptGraph({1: "a", 2: "b", 3: "c"}, [(1, 2), (2, 3), (3, 2)]), [1])
+assert cyclic.path_to(2, set()) == [] and cyclic.descendant_count(1) == 0, "Cycle nodes are unreachable"
+print("Reachability works")
+
+# Feedback edges: removing them leaves a DAG, and none of them can be put back
+assert feedback_edges(dict.fromkeys(ids, ""), dag_edges) == [], "Nothing to remove from a DAG"
+for seed in range(5):
+    r = random.Random(seed)
+    cyclic_edges = [(a, b) for a in ids for b in ids if r.random() < 0.05] + [(ids[0], ids[0])]
+    removed = feedback_edges(dict.fromkeys(ids, ""), cyclic_edges)
+    kept = [e for e in cyclic_edges if e not in removed]
+    assert ConceptGraph(dict.fromkeys(ids, ""), kept).is_valid_dag(), "Repaired graph is a DAG"
+    assert (ids[0], ids[0]) in removed, "Self-loop removed"
+    for e in removed:
+        assert not ConceptGraph(dict.fromkeys(ids, ""), kept + [e]).is_valid_dag(), "Feedback set is minimal"
+assert feedback_edges({1: "a", 2: "b"}, [(1, 2), (2, 1), (2, 9)]) in ([(1, 2)], [(2, 1)]), "Two-cycle loses one edge"
+print("Feedback edges work")
+
+# Next-concept ranking: only learnable concepts, best pick completes the most frontier concepts
+#   1 -> 3, 2 -> 3, 2 -> 4 -> 5 -> 6, 7 (isolated)
+g = ConceptGraph({i: str(i) for i in range(1, 8)}, [(1, 3), (2, 3), (2, 4), (4, 5), (5, 6)])
+state = UnlockState(g, {1})
+ranked = rank_next(state, ReachabilityIndex(g, g.topological_sort()), {7: 1}, limit=10)
+assert sorted(c["id"] for c in ranked) == sorted(learnable(state)) == [2, 7], "Candidates are learnable now"
+assert ranked[0]["id"] == 2 and ranked[0]["completes"] == [3, 4] and ranked[0]["downstream"] == 4
+assert rank_next(UnlockState(g, set(range(1, 8))), ReachabilityIndex(g, g.topological_sort())) == []
+state = UnlockState(ref, m)
+ranked = rank_next(state, index, limit=len(ids))
+assert [c["score"] for c in ranked] == sorted((c["score"] for c in ranked), reverse=True), "Best first"
+assert all(all(p in m for p in ref.prerequisites(c["id"])) and c["id"] not in m for c in ranked)
+print("Ranking works")
+
 print("\nAll tests passed ")
\ No newline at end of file
@@ -0,0 +1,73 @@
+class UnlockState:
+    """
+    Live unlocked / frontier sets for one learner on one topic.
+
+    Keeps the number of unmastered prerequisites per concept, so toggling a
+    concept only revisits that concept and its direct dependents — O(out-degree)
+    instead of the O(V+E) rescans in ConceptGraph.get_unlocked / get_frontier.
+    Semantics match those methods: concepts without prerequisites are never
+    reported as unlocked or frontier.
+    """
+    def __init__(self, graph, mastered_ids):
+        self.graph    = graph
+        self.mastered = {m for m in mastered_ids if m in graph.concepts}
+        self.missing  = {}   # concept -> unmastered prerequisite count
+        self.unlocked = set()
+        self.frontier = set()
+
+        for node in graph.concepts:
+            self.missing[node] = sum(1 for p in graph.prerequisites(node) if p not in self.mastered)
+            status = self._status(node)
+            if status == "unlocked":
+                self.unlocked.add(node)
+            elif status == "frontier":
+                self.frontier.add(node)
+
+    def _status(self, node):
+        if node in self.mastered or not self.graph.prerequisites(node):
+            return None
+        missing = self.missing[node]
+        if missing == 0:
+            return "unlocked"
+        if missing == 1:
+            return "frontier"
+        return None
+
+    def set_mastered(self, node, mastered: bool) -> dict:
+        """Applies one toggle and returns what changed in the unlocked / frontier sets."""
+        delta = {"unlocked_added": [], "unlocked_removed": [], "frontier_added": [], "frontier_removed": []}
+        if node not in self.missing or (node in self.mastered) == mastered:
+            return delta
+
+        # Dangling or cross-topic edges may point at concepts outside this topic
+        dependents = [d for d in self.graph.dependents(node) if d in self.missing]
+        touched    = list(dict.fromkeys([node, *dependents]))
+        before     = {n: self._status(n) for n in touched}
+
+        if mastered:
+            self.mastered.add(node)
+        else:
+            self.mastered.discard(node)
+        step = -1 if mastered else 1
+        for d in dependents:
+            self.missing[d] += step
+
+        for n in touched:
+            old, new = before[n], self._status(n)
+            if old == new:
+                continue
+            if old == "unlocked":
+                self.unlocked.discard(n); delta["unlocked_removed"].append(n)
+            elif old == "frontier":
+                self.frontier.discard(n); delta["frontier_removed"].append(n)
+            if new == "unlocked":
+                self.unlocked.add(n); delta["unlocked_added"].append(n)
+            elif new == "frontier":
+                self.frontier.add(n); delta["frontier_added"].append(n)
+        return delta
+
+    def get_unlocked(self) -> list:
+        return sorted(self.unlocked)
+
+    def get_frontier(self) -> list:
+        return sorted(self.frontier)
@@ -0,0 +1,37 @@
+import hashlib
+import os
+import orjson
+from dotenv import load_dotenv
+from fastapi import Request, Response
+
+load_dotenv()
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 60))   # seconds browsers may reuse topic data
+
+def json_bytes(obj) -> bytes:
+    """orjson: several times faster than json.dumps for the large path / edge payloads."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+def etag_of(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag in tags
+
+def cached_json(request: Request, etag: str, body, max_age: int = HTTP_CACHE_MAX_AGE) -> Response:
+    """
+    200 with the JSON body, or 304 when If-None-Match carries `etag`.
+    `body` may be a callable so a 304 never builds or encodes the payload.
+    max_age=0 makes clients revalidate on every use.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}" if max_age else "no-cache",
+    }
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body() if callable(body) else body, media_type="application/json", headers=headers)
@@ -0,0 +1,38 @@
+"""
+Bulk-imports a curriculum file as a new topic.
+
+Run from backend/:
+    python import_curriculum.py curriculum.csv --name "Linear Algebra"
+    python import_curriculum.py concepts.jsonl --name "Rust" --chunk-size 5000
+
+CSV columns: id,name,description,difficulty,resources,prerequisites
+(prerequisites separated by ';'). JSON is a top-level array of objects with
+the same fields; JSON Lines is one object per line.
+"""
+import argparse
+import json
+import sys
+
+from services.import_service import import_curriculum, format_from_filename, READERS, IMPORT_CHUNK_SIZE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--name", required=True, help="topic name")
+    parser.add_argument("--description", default="")
+    parser.add_argument("--format", choices=list(READERS), help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        fmt = args.format or format_from_filename(args.path)
+        with open(args.path, encoding="utf-8", newline="") as f:
+            result = import_curriculum(f, fmt, args.name, args.description, chunk_size=args.chunk_size)
+    except ValueError as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
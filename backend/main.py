@@ -1,10 +1,20 @@
-from fastapi import FastAPI
+import json
+import logging
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from routes.topics import router as topics_router
 from routes.ai import router as ai_router
 from routes.roadmap import router as roadmap_router
 from routes.auth     import router as auth_router
 from routes.progress import router as progress_router
+from database import pool, async_pool
+from services.roadmap_service import shutdown_roadmaps
+from services.auth_service import shutdown_hasher
+from services.progress_writer import progress_writer
+from services.quiz_pool import quiz_pool
+import metrics
 
 app = FastAPI(title="ConceptGraph API", version="1.0.0")
 
@@ -13,7 +23,40 @@ app.add_middleware(
     allow_origins=["http://localhost:5173"],  # React dev server
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)   # skips text/event-stream, so SSE still streams
+
+request_log = logging.getLogger("conceptgraph.requests")
+if metrics.REQUEST_LOG and not request_log.handlers:
+    request_log.addHandler(logging.StreamHandler())
+    request_log.setLevel(logging.INFO)
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """
+    Per-route latency histogram, plus (REQUEST_LOG=1) one JSON line per request
+    with the DB, pool-wait and LLM time spent inside it. Streaming responses are
+    timed to their first byte.
+    """
+    ctx = {}
+    token = metrics.request_context.set(ctx)
+    start, status = time.perf_counter(), 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.http_duration.observe(elapsed, request.method, path, status)
+        if metrics.REQUEST_LOG:
+            request_log.info(json.dumps({
+                "method": request.method, "route": path, "status": status,
+                "ms": round(elapsed * 1000, 2), **{k: round(v, 2) for k, v in ctx.items()},
+            }))
+        metrics.request_context.reset(token)
 
 app.include_router(topics_router, prefix="/topics", tags=["topics"])
 app.include_router(ai_router, prefix="/ai", tags=["ai"])
@@ -25,3 +68,15 @@ app.include_router(progress_router, prefix="/progress", tags=["progress"])
 def root():
     return {"status": "ok", "message": "ConceptGraph API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("shutdown")
+async def close_pool():
+    shutdown_roadmaps()
+    shutdown_hasher()
+    progress_writer.stop()
+    quiz_pool.shutdown()
+    pool.dispose()
+    await async_pool.dispose()
@@ -0,0 +1,194 @@
+"""
+In-process metrics with Prometheus text exposition (served on GET /metrics).
+
+Counters and histograms are labelled and thread-safe. A per-request context
+(see `request_context`) additionally accumulates DB and LLM time so the request
+middleware can emit one structured timing log line per request.
+"""
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REQUEST_LOG = os.getenv("REQUEST_LOG", "0") == "1"       # one JSON timing line per request
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        self._values = {}
+        self._lock   = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = BUCKETS):
+        self.name, self.help, self.label_names, self.buckets = name, help, labels, buckets
+        self._series = {}             # labels -> [bucket counts..., sum, count]
+        self._lock   = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, series):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+class Gauge:
+    """Read at scrape time from a callback returning {labels_tuple: value}."""
+    def __init__(self, name: str, help: str, labels: tuple, collect):
+        self.name, self.help, self.label_names, self.collect = name, help, labels, collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+_registry = []
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        try:
+            lines += metric.render()
+        except Exception:            # a failing collector must not break the scrape
+            continue
+    return "\n".join(lines) + "\n"
+
+# ── Metrics ──────────────────────────────────────────────────
+
+http_duration  = register(Histogram("http_request_duration_seconds", "Request latency by route",
+                                    ("method", "route", "status")))
+db_calls       = register(Histogram("db_call_duration_seconds", "Repository function wall time",
+                                    ("function",)))
+db_queries     = register(Counter("db_queries_total", "SQL statements executed, by repository function",
+                                  ("function",)))
+db_acquire     = register(Histogram("db_pool_acquire_seconds", "Time waiting for a pooled connection"))
+llm_duration   = register(Histogram("llm_request_duration_seconds", "LLM call latency",
+                                    ("model", "function", "mode")))
+llm_requests   = register(Counter("llm_requests_total", "LLM calls by outcome (ok, error, cached, cancelled)",
+                                  ("model", "function", "outcome")))
+llm_tokens     = register(Counter("llm_tokens_total", "LLM tokens by direction (in = prompt, out = completion)",
+                                  ("model", "function", "direction")))
+graph_duration = register(Histogram("graph_engine_seconds", "Graph engine work by operation",
+                                    ("operation", "engine")))
+auth_duration  = register(Histogram("auth_seconds", "Auth path timings by operation", ("operation",)))
+
+# ── Per-request accumulation ─────────────────────────────────
+
+request_context: ContextVar = ContextVar("request_context", default=None)
+_db_function: ContextVar = ContextVar("db_function", default="other")
+
+def _add(key: str, seconds: float, count: int = 1):
+    ctx = request_context.get()
+    if ctx is not None:
+        ctx[key + "_ms"]    = ctx.get(key + "_ms", 0.0) + seconds * 1000
+        ctx[key + "_count"] = ctx.get(key + "_count", 0) + count
+
+def record_query():
+    db_queries.inc(_db_function.get())
+    ctx = request_context.get()
+    if ctx is not None:
+        ctx["db_queries"] = ctx.get("db_queries", 0) + 1
+
+def record_acquire(seconds: float):
+    db_acquire.observe(seconds)
+    _add("db_acquire", seconds)
+
+def record_llm(seconds: float, model: str, function: str, mode: str = "complete"):
+    llm_duration.observe(seconds, model, function, mode)
+    _add("llm", seconds)
+
+class timed:
+    """Context manager: `with timed(graph_duration, "compile", engine):` observes the elapsed time."""
+    def __init__(self, histogram: Histogram, *labels):
+        self.histogram, self.labels = histogram, labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+def instrument_db(fn):
+    """
+    Times a repository function and attributes the statements it runs to it.
+    Handles coroutines; generators must instrument their own queries. Nested calls are observed but only the outermost one
+    adds to the request's DB time.
+    """
+    name = fn.__name__
+
+    def finish(start, outer):
+        elapsed = time.perf_counter() - start
+        db_calls.observe(elapsed, name)
+        if outer:
+            _add("db", elapsed)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            outer = _db_function.get() == "other"
+            start, token = time.perf_counter(), _db_function.set(name)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _db_function.reset(token)
+                finish(start, outer)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        outer = _db_function.get() == "other"
+        start, token = time.perf_counter(), _db_function.set(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _db_function.reset(token)
+            finish(start, outer)
+    return wrapper
@@ -0,0 +1,20 @@
+-- Indexes for the progress and graph read paths.
+-- Apply once:  mysql conceptgraph < backend/migrations/001_progress_indexes.sql
+
+-- get_mastered: learner + status first, concept_id covered for the join
+CREATE INDEX idx_progress_user_status ON user_progress (user_id, status, concept_id);
+
+-- iter_topic_progress (cohort report): join from the topic's concepts into progress
+CREATE INDEX idx_progress_concept ON user_progress (concept_id, user_id, status);
+
+-- load_graph_data / get_mastered: concepts of one topic
+CREATE INDEX idx_concepts_topic ON concepts (topic_id, id);
+
+-- load_graph_data: edges by source concept
+CREATE INDEX idx_dependencies_from ON dependencies (from_concept_id, to_concept_id);
+
+-- Rollback:
+-- DROP INDEX idx_progress_user_status ON user_progress;
+-- DROP INDEX idx_progress_concept     ON user_progress;
+-- DROP INDEX idx_concepts_topic       ON concepts;
+-- DROP INDEX idx_dependencies_from    ON dependencies;
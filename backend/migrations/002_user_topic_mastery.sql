@@ -0,0 +1,19 @@
+-- Compact per-(user, topic) mastery bitmaps, used when PROGRESS_BITMAP=1.
+-- Apply once:  mysql conceptgraph < backend/migrations/002_user_topic_mastery.sql
+--
+-- Bit i of `bitmap` is the topic concept with the i-th smallest id.
+-- `concept_hash` is the crc32 of the topic's sorted concept ids the bitmap was
+-- built against; rows with a different hash are rebuilt from user_progress on
+-- the next read, so no backfill is needed. user_progress stays the source of truth.
+
+CREATE TABLE user_topic_mastery (
+  user_id      INT NOT NULL REFERENCES users(id),
+  topic_id     INT NOT NULL REFERENCES topics(id),
+  concept_hash INT UNSIGNED NOT NULL,
+  bitmap       MEDIUMBLOB NOT NULL,
+  updated_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id, topic_id)
+);
+
+-- Rollback:
+-- DROP TABLE user_topic_mastery;
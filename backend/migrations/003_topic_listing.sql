@@ -0,0 +1,22 @@
+-- Keyset-paginated topic listing with precomputed sizes.
+-- Apply once:  mysql conceptgraph < backend/migrations/003_topic_listing.sql
+
+-- Concept / edge counts, kept up to date by save_generated_topic and the importer
+ALTER TABLE topics
+  ADD COLUMN concept_count INT UNSIGNED NOT NULL DEFAULT 0,
+  ADD COLUMN edge_count    INT UNSIGNED NOT NULL DEFAULT 0;
+
+UPDATE topics t SET
+  concept_count = (SELECT COUNT(*) FROM concepts c WHERE c.topic_id = t.id),
+  edge_count    = (SELECT COUNT(*) FROM dependencies d
+                   JOIN concepts c ON c.id = d.from_concept_id
+                   WHERE c.topic_id = t.id);
+
+-- list_topics: newest first, seeks past the (created_at, id) cursor
+CREATE INDEX idx_topics_created ON topics (created_at, id);
+
+-- Name-prefix search (name LIKE 'abc%') uses the UNIQUE index on topics.name
+
+-- Rollback:
+-- DROP INDEX idx_topics_created ON topics;
+-- ALTER TABLE topics DROP COLUMN concept_count, DROP COLUMN edge_count;
@@ -1,46 +1,75 @@
-from database import get_connection
+from database import connection, async_connection, fetch_all, fetch_one
+from metrics import instrument_db
 
-def load_graph_data(topic_id: int):
+GRAPH_CONCEPTS_SQL = "SELECT id, name FROM concepts WHERE topic_id = %s"
+GRAPH_EDGES_SQL = """
+    SELECT d.from_concept_id, d.to_concept_id
+    FROM dependencies d
+    JOIN concepts c ON c.id = d.from_concept_id
+    WHERE c.topic_id = %s
+"""
+
+@instrument_db
+def load_graph_data(topic_id: int, conn=None):
     """
     Fetches concepts and dependencies for a topic from MySQL.
     Returns raw data — no graph logic here.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(
-        "SELECT id, name FROM concepts WHERE topic_id = %s",
-        (topic_id,)
-    )
-    concepts = {row["id"]: row["name"] for row in cursor.fetchall()}
-
-    cursor.execute("""
-        SELECT d.from_concept_id, d.to_concept_id
-        FROM dependencies d
-        JOIN concepts c ON c.id = d.from_concept_id
-        WHERE c.topic_id = %s
-    """, (topic_id,))
-    edges = [(row["from_concept_id"], row["to_concept_id"]) for row in cursor.fetchall()]
-
-    cursor.close()
-    conn.close()
+    with connection(conn) as conn:
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute(GRAPH_CONCEPTS_SQL, (topic_id,))
+        concepts = {row["id"]: row["name"] for row in cursor.fetchall()}
+
+        cursor.execute(GRAPH_EDGES_SQL, (topic_id,))
+        edges = [(row["from_concept_id"], row["to_concept_id"]) for row in cursor.fetchall()]
+
+        cursor.close()
 
     return concepts, edges
 
-def get_concept_by_id(concept_id: int):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT id, name, description, difficulty_level, resources FROM concepts WHERE id = %s",
-        (concept_id,)
-    )
-    concept = cursor.fetchone()
-    cursor.close()
-    conn.close()
+@instrument_db
+async def load_graph_data_async(topic_id: int, conn=None):
+    """load_graph_data on the async pool."""
+    async with async_connection(conn) as conn:
+        concepts = dict(await fetch_all(conn, GRAPH_CONCEPTS_SQL, (topic_id,)))
+        edges = [tuple(row) for row in await fetch_all(conn, GRAPH_EDGES_SQL, (topic_id,))]
+    return concepts, edges
+
+@instrument_db
+def get_concept_difficulties(topic_id: int, conn=None) -> dict:
+    """{concept_id: difficulty_level} for concepts on a topic that have one."""
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, difficulty_level FROM concepts WHERE topic_id = %s AND difficulty_level IS NOT NULL",
+            (topic_id,)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+    return {r[0]: r[1] for r in rows}
+
+@instrument_db
+def get_concept_topic_id(concept_id: int, conn=None):
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT topic_id FROM concepts WHERE id = %s", (concept_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    return row[0] if row else None
+
+@instrument_db
+async def get_concept_by_id_async(concept_id: int, conn=None):
+    async with async_connection(conn) as conn:
+        concept = await fetch_one(
+            conn,
+            "SELECT id, topic_id, name, description, difficulty_level, resources FROM concepts WHERE id = %s",
+            (concept_id,), dictionary=True
+        )
     if not concept:
         return None
     if concept["resources"]:
         concept["resources"] = [r.strip() for r in concept["resources"].split(",")]
     else:
         concept["resources"] = []
-    return concept
\ No newline at end of file
+    return concept
@@ -1,32 +1,162 @@
-from database import get_connection
+from database import connection, async_connection, fetch_all, fetch_one, execute
+from metrics import instrument_db
 
-def get_mastered(user_id: int, topic_id: int) -> list[int]:
-    conn   = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT concept_id FROM user_progress
-        WHERE user_id = %s AND status = 'mastered'
-        AND concept_id IN (
-            SELECT id FROM concepts WHERE topic_id = %s
-        )
-    """, (user_id, topic_id))
-    rows = cursor.fetchall()
-    cursor.close(); conn.close()
+# Index-friendly join: idx_progress_user_status narrows to the learner, concepts PK filters the topic
+MASTERED_SQL = """
+    SELECT up.concept_id
+    FROM user_progress up
+    JOIN concepts c ON c.id = up.concept_id
+    WHERE up.user_id = %s AND up.status = 'mastered' AND c.topic_id = %s
+"""
+BITMAP_SQL = "SELECT concept_hash, bitmap FROM user_topic_mastery WHERE user_id = %s AND topic_id = %s"
+# A stored bitmap that is already built against the same concept layout is kept: it was
+# written together with the progress rows and may be newer than the rows this one was built from.
+SAVE_BITMAP_SQL = """
+    INSERT INTO user_topic_mastery (user_id, topic_id, concept_hash, bitmap)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        bitmap       = IF(concept_hash = VALUES(concept_hash), bitmap, VALUES(bitmap)),
+        concept_hash = VALUES(concept_hash)
+"""
+
+@instrument_db
+def get_mastered(user_id: int, topic_id: int, conn=None) -> list[int]:
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        cursor.execute(MASTERED_SQL, (user_id, topic_id))
+        rows = cursor.fetchall()
+        cursor.close()
+    return [r[0] for r in rows]
+
+@instrument_db
+async def get_mastered_async(user_id: int, topic_id: int, conn=None) -> list[int]:
+    async with async_connection(conn) as conn:
+        rows = await fetch_all(conn, MASTERED_SQL, (user_id, topic_id))
     return [r[0] for r in rows]
 
-def set_mastered(user_id: int, concept_id: int, mastered: bool):
-    conn   = get_connection()
-    cursor = conn.cursor()
-    if mastered:
-        cursor.execute("""
-            INSERT INTO user_progress (user_id, concept_id, status, last_updated)
-            VALUES (%s, %s, 'mastered', NOW())
-            ON DUPLICATE KEY UPDATE status = 'mastered', last_updated = NOW()
-        """, (user_id, concept_id))
+@instrument_db
+def get_mastery_bitmap(user_id: int, topic_id: int, conn=None):
+    """(concept_hash, bitmap) from user_topic_mastery, or None."""
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        cursor.execute(BITMAP_SQL, (user_id, topic_id))
+        row = cursor.fetchone()
+        cursor.close()
+    return (row[0], bytes(row[1])) if row else None
+
+@instrument_db
+async def get_mastery_bitmap_async(user_id: int, topic_id: int, conn=None):
+    async with async_connection(conn) as conn:
+        row = await fetch_one(conn, BITMAP_SQL, (user_id, topic_id))
+    return (row[0], bytes(row[1])) if row else None
+
+@instrument_db
+def save_mastery_bitmap(user_id: int, topic_id: int, concept_hash: int, bitmap: bytes, conn=None):
+    """Stores a bitmap rebuilt from user_progress, unless a current one is already stored."""
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        cursor.execute(SAVE_BITMAP_SQL, (user_id, topic_id, concept_hash, bitmap))
+        conn.commit()
+        cursor.close()
+
+@instrument_db
+async def save_mastery_bitmap_async(user_id: int, topic_id: int, concept_hash: int, bitmap: bytes, conn=None):
+    async with async_connection(conn) as conn:
+        await execute(conn, SAVE_BITMAP_SQL, (user_id, topic_id, concept_hash, bitmap))
+
+@instrument_db
+def set_mastered(user_id: int, concept_id: int, mastered: bool, conn=None):
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        if mastered:
+            cursor.execute("""
+                INSERT INTO user_progress (user_id, concept_id, status, last_updated)
+                VALUES (%s, %s, 'mastered', NOW())
+                ON DUPLICATE KEY UPDATE status = 'mastered', last_updated = NOW()
+            """, (user_id, concept_id))
+        else:
+            cursor.execute("""
+                UPDATE user_progress SET status = 'not_started', last_updated = NOW()
+                WHERE user_id = %s AND concept_id = %s
+            """, (user_id, concept_id))
+        conn.commit()
+        cursor.close()
+
+def _refresh_bitmap(cursor, user_id: int, topic_id: int, codec, changes: dict):
+    """
+    Brings a user_topic_mastery row in line with progress rows just written in
+    this transaction. The stored row is locked and only `changes` are applied
+    to it; a missing or stale row is rebuilt from user_progress. Never built
+    from a process-local copy, which other workers may have outdated.
+    """
+    cursor.execute(BITMAP_SQL + " FOR UPDATE", (user_id, topic_id))
+    row = cursor.fetchone()
+    if row is not None and row[0] == codec.fingerprint:
+        mastered = set(codec.decode(bytes(row[1])))
+        for concept_id, is_mastered in changes.items():
+            if is_mastered:
+                mastered.add(concept_id)
+            else:
+                mastered.discard(concept_id)
     else:
-        cursor.execute("""
-            UPDATE user_progress SET status = 'not_started', last_updated = NOW()
-            WHERE user_id = %s AND concept_id = %s
-        """, (user_id, concept_id))
-    conn.commit()
-    cursor.close(); conn.close()
\ No newline at end of file
+        cursor.execute(MASTERED_SQL + " LOCK IN SHARE MODE", (user_id, topic_id))
+        mastered = {r[0] for r in cursor.fetchall()}
+    cursor.execute("""
+        INSERT INTO user_topic_mastery (user_id, topic_id, concept_hash, bitmap)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE concept_hash = VALUES(concept_hash), bitmap = VALUES(bitmap)
+    """, (user_id, topic_id, codec.fingerprint, codec.encode(mastered)))
+
+@instrument_db
+def upsert_progress(rows: list, conn=None, chunk_size: int = 1000, bitmaps: list = ()):
+    """
+    Writes many (user_id, concept_id, mastered) rows with one multi-row upsert
+    per `chunk_size` rows. `bitmaps` are (user_id, topic_id, MasteryBitmap):
+    those user_topic_mastery rows are updated with the same rows, in the same transaction.
+    """
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            cursor.execute(
+                "INSERT INTO user_progress (user_id, concept_id, status, last_updated) VALUES "
+                + ", ".join(["(%s, %s, %s, NOW())"] * len(chunk))
+                + " ON DUPLICATE KEY UPDATE status = VALUES(status), last_updated = NOW()",
+                [v for user_id, concept_id, mastered in chunk
+                   for v in (user_id, concept_id, "mastered" if mastered else "not_started")]
+            )
+        for user_id, topic_id, codec in bitmaps:
+            changes = {c: m for u, c, m in rows if u == user_id and c in codec.index}
+            _refresh_bitmap(cursor, user_id, topic_id, codec, changes)
+        conn.commit()
+        cursor.close()
+
+@instrument_db
+def _query_topic_progress(cursor, topic_id: int):
+    cursor.execute("""
+        SELECT up.user_id, up.concept_id, up.status = 'mastered'
+        FROM user_progress up
+        JOIN concepts c ON c.id = up.concept_id
+        WHERE c.topic_id = %s
+    """, (topic_id,))
+
+@instrument_db
+def _fetch_topic_progress(cursor, batch_size: int) -> list:
+    return cursor.fetchmany(batch_size)
+
+def iter_topic_progress(topic_id: int, conn=None, batch_size: int = 5000):
+    """
+    Streams (user_id, concept_id, is_mastered) for every progress row on a topic,
+    in no particular order. Uses an unbuffered cursor so the result set is never fully in memory.
+    Only the query and each fetch are timed as DB work, not the caller's time between rows.
+    """
+    with connection(conn) as conn:
+        cursor = conn.cursor(buffered=False)
+        _query_topic_progress(cursor, topic_id)
+        while True:
+            rows = _fetch_topic_progress(cursor, batch_size)
+            if not rows:
+                break
+            for user_id, concept_id, mastered in rows:
+                yield user_id, concept_id, bool(mastered)
+        cursor.close()
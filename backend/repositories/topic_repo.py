@@ -1,45 +1,97 @@
-from database import get_connection
+from database import connection, async_connection, fetch_all
+from metrics import instrument_db
 
-def save_generated_topic(topic_name: str, description: str, concepts: list, dependencies: list) -> int:
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Insert topic
+@instrument_db
+def insert_topic(cursor, topic_name: str, description: str) -> int:
     cursor.execute(
         "INSERT INTO topics (name, description) VALUES (%s, %s)",
         (topic_name, description)
     )
-    topic_id = cursor.lastrowid
-
-    # Insert concepts and track id mapping (AI ids → real DB ids)
-    id_map = {}
-    for c in concepts:
-        cursor.execute(
-            "INSERT INTO concepts (topic_id, name, description, difficulty_level) VALUES (%s, %s, %s, %s)",
-            (topic_id, c["name"], c["description"], c["difficulty"])
+    return cursor.lastrowid
+
+@instrument_db
+def insert_concepts(cursor, topic_id: int, concepts: list, after_id: int = 0) -> list[int]:
+    """
+    Multi-row insert of one chunk of concepts; returns their DB ids in input order.
+    Ids are read back with one SELECT — InnoDB hands out increasing ids in row
+    order within a statement, but not necessarily consecutive ones, so lastrowid
+    arithmetic is not safe. `after_id` is the largest id of the previous chunk.
+    """
+    if not concepts:
+        return []
+    cursor.executemany(
+        "INSERT INTO concepts (topic_id, name, description, difficulty_level, resources) VALUES (%s, %s, %s, %s, %s)",
+        [(topic_id, c["name"], c.get("description"), c.get("difficulty"), c.get("resources")) for c in concepts]
+    )
+    cursor.execute(
+        "SELECT id FROM concepts WHERE topic_id = %s AND id > %s ORDER BY id LIMIT %s",
+        (topic_id, after_id, len(concepts))
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+@instrument_db
+def insert_dependencies(cursor, edges: list):
+    """Multi-row insert of (from_concept_id, to_concept_id) pairs using DB ids."""
+    if edges:
+        cursor.executemany(
+            "INSERT INTO dependencies (from_concept_id, to_concept_id) VALUES (%s, %s)",
+            edges
         )
-        id_map[c["id"]] = cursor.lastrowid
-
-    # Insert dependencies using real DB ids
-    for d in dependencies:
-        from_id = id_map.get(d["from"])
-        to_id   = id_map.get(d["to"])
-        if from_id and to_id:
-            cursor.execute(
-                "INSERT INTO dependencies (from_concept_id, to_concept_id) VALUES (%s, %s)",
-                (from_id, to_id)
-            )
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+
+@instrument_db
+def set_topic_counts(cursor, topic_id: int, concept_count: int, edge_count: int):
+    """Stores the sizes shown in the topic listing (migrations/003)."""
+    cursor.execute(
+        "UPDATE topics SET concept_count = %s, edge_count = %s WHERE id = %s",
+        (concept_count, edge_count, topic_id)
+    )
+
+@instrument_db
+def save_generated_topic(topic_name: str, description: str, concepts: list, dependencies: list, conn=None) -> int:
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        topic_id = insert_topic(cursor, topic_name, description)
+
+        # Track id mapping (AI ids → real DB ids)
+        db_ids = insert_concepts(cursor, topic_id, concepts)
+        id_map = {c["id"]: db_id for c, db_id in zip(concepts, db_ids)}
+
+        # Insert dependencies using real DB ids
+        edges = []
+        for d in dependencies:
+            from_id = id_map.get(d["from"])
+            to_id   = id_map.get(d["to"])
+            if from_id and to_id:
+                edges.append((from_id, to_id))
+        insert_dependencies(cursor, edges)
+        set_topic_counts(cursor, topic_id, len(db_ids), len(edges))
+
+        conn.commit()
+        cursor.close()
     return topic_id
 
-def get_all_topics() -> list:
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT id, name, description, created_at FROM topics ORDER BY created_at DESC")
-    topics = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return topics
\ No newline at end of file
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+@instrument_db
+async def list_topics_async(limit: int, after: tuple = None, prefix: str = None, conn=None) -> list:
+    """
+    One page of topics, newest first, without descriptions.
+    `after` is the (created_at, id) of the previous page's last row; the
+    seek is served by idx_topics_created, the prefix filter by the name index.
+    """
+    where, params = [], []
+    if after is not None:
+        where.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        params += [after[0], after[0], after[1]]
+    if prefix:
+        where.append("name LIKE %s")
+        params.append(_like_prefix(prefix))
+    sql = "SELECT id, name, created_at, concept_count, edge_count FROM topics"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT %s"
+    params.append(limit)
+
+    async with async_connection(conn) as conn:
+        return await fetch_all(conn, sql, params, dictionary=True)
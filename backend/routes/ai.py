@@ -1,6 +1,17 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from services.ai_service import explain_concept, suggest_next, generate_quiz
+import json
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from services.ai_service import (
+    explain_concept_async, suggest_next_async, phrase_suggestion_async, answer_question_async,
+    stream_explanation, stream_answer,
+)
+from services.llm_cache import llm_cache
+from services.quiz_pool import quiz_pool, serve_quiz_async
+from services.chat_sessions import start_session, get_session, ask, stream_ask
+from services.progress_service import get_next_concepts
+from routes.auth import get_optional_user, get_current_user
 
 router = APIRouter()
 
@@ -21,27 +32,114 @@ class ChatRequest(BaseModel):
     mastered_names: list[str]
     history: list[dict] = []
 
+# Session prompts are only bounded if what goes into them is: the system prompt
+# is built from these fields once, and each question is sent verbatim.
+ConceptName  = Annotated[str, Field(max_length=255)]
+QuestionText = Annotated[str, Field(max_length=1000)]
+
+class ChatSessionRequest(BaseModel):
+    concept_name: ConceptName
+    explanation: str = Field(max_length=4000)
+    mastered_names: list[ConceptName] = Field(max_length=500)
+
+class FollowUpRequest(BaseModel):
+    question: str = Field(max_length=2000)
+
 @router.post("/explain")
-def explain(body: ExplainRequest):
-    text = explain_concept(body.concept_name, body.concept_description, body.mastered_names)
+async def explain(body: ExplainRequest):
+    text = await explain_concept_async(body.concept_name, body.concept_description, body.mastered_names)
     return {"explanation": text}
 
+def _sse(request: Request, chunks) -> StreamingResponse:
+    """
+    Server-Sent Events: one `data: {"token": ...}` event per chunk, then `event: done`.
+    Stops and closes the upstream stream as soon as the client disconnects.
+    """
+    async def events():
+        try:
+            async for text in chunks:
+                if await request.is_disconnected():
+                    break
+                yield f"data: {json.dumps({'token': text})}\n\n"
+            else:
+                yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/explain/stream")
+async def explain_stream(body: ExplainRequest, request: Request):
+    return _sse(request, stream_explanation(body.concept_name, body.concept_description, body.mastered_names))
+
 @router.post("/suggest")
-def suggest(body: SuggestRequest):
-    text = suggest_next(body.mastered_names, body.unlocked_names, body.frontier_names)
+async def suggest(body: SuggestRequest):
+    text = await suggest_next_async(body.mastered_names, body.unlocked_names, body.frontier_names)
     return {"suggestion": text}
 
+@router.get("/suggest/{topic_id}")
+async def suggest_for_topic(topic_id: int, phrase: bool = True, limit: int = Query(5, ge=1, le=50),
+                            user=Depends(get_current_user)):
+    """
+    Fast path: the next concept is ranked from the graph and your progress.
+    With `phrase`, the top pick is also put into words by the LLM.
+    Progress is read over the async pool; no connection is held across the LLM call.
+    """
+    result = await get_next_concepts(user["id"], topic_id, limit=limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    ranked = result["next"]
+    suggestion = None
+    if phrase and ranked:
+        top = ranked[0]
+        suggestion = await phrase_suggestion_async(top["name"], [c["name"] for c in top["completes"]], top["downstream"])
+    return {"topic_id": topic_id, "next": ranked, "suggestion": suggestion}
+
 class QuizRequest(BaseModel):
-    concept_name: str
-    mastered_names: list[str]
-    previous_questions: list[str] = []
+    concept_name: ConceptName
+    mastered_names: list[ConceptName] = Field(max_length=500)
+    previous_questions: list[QuestionText] = Field([], max_length=50)   # ignored for signed-in learners
 
 @router.post("/quiz")
-def quiz(body: QuizRequest):
-    result = generate_quiz(body.concept_name, body.mastered_names, body.previous_questions)
-    return result
+async def quiz(body: QuizRequest, user=Depends(get_optional_user)):
+    """Served from the question pool when possible; signed-in learners never get a question twice."""
+    return await serve_quiz_async(body.concept_name, body.mastered_names, body.previous_questions,
+                            user_id=user["id"] if user else None)
+
+@router.get("/quiz/stats")
+async def quiz_stats():
+    return quiz_pool.stats()
 
 @router.post("/chat")
-def chat(body: ChatRequest):
-    from services.ai_service import answer_question
-    return {"answer": answer_question(body.concept_name, body.explanation, body.question, body.mastered_names, body.history)}
+async def chat(body: ChatRequest):
+    return {"answer": await answer_question_async(body.concept_name, body.explanation, body.question, body.mastered_names, body.history)}
+
+@router.post("/chat/stream")
+async def chat_stream(body: ChatRequest, request: Request):
+    return _sse(request, stream_answer(body.concept_name, body.explanation, body.question, body.mastered_names, body.history))
+
+@router.post("/chat/sessions")
+async def chat_session(body: ChatSessionRequest):
+    """Starts a server-side chat; follow-ups then send only the question."""
+    return {"session_id": start_session(body.concept_name, body.explanation, body.mastered_names)}
+
+def _session(session_id: str):
+    session = get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return session
+
+@router.post("/chat/sessions/{session_id}")
+async def chat_in_session(session_id: str, body: FollowUpRequest):
+    return {"answer": await ask(_session(session_id), body.question)}
+
+@router.post("/chat/sessions/{session_id}/stream")
+async def chat_in_session_stream(session_id: str, body: FollowUpRequest, request: Request):
+    return _sse(request, stream_ask(_session(session_id), body.question))
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return llm_cache.stats()
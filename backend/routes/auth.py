@@ -3,11 +3,12 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from services.auth_service import (
     register_user, login_user, create_token,
-    decode_token, get_user_by_id
+    verify_token, is_admin, AuthBusy, auth_timings, principal_cache
 )
 
 router  = APIRouter()
 bearer  = HTTPBearer()
+optional_bearer = HTTPBearer(auto_error=False)
 
 class RegisterBody(BaseModel):
     email:    str
@@ -17,35 +18,55 @@ class LoginBody(BaseModel):
     email:    str
     password: str
 
-def get_current_user(creds: HTTPAuthorizationCredentials = Depends(bearer)):
+async def get_current_user(creds: HTTPAuthorizationCredentials = Depends(bearer)):
+    """Cached token -> user lookup; only a cache miss borrows a DB connection (from the async pool)."""
     try:
-        payload = decode_token(creds.credentials)
-        user_id = int(payload["sub"])
-        user    = get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        user = await verify_token(creds.credentials)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+async def get_admin_user(user=Depends(get_current_user)):
+    """The signed-in user if they are listed in ADMIN_EMAILS, otherwise a 403."""
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Instructor access required")
+    return user
+
+async def get_optional_user(creds: HTTPAuthorizationCredentials | None = Depends(optional_bearer)):
+    """The signed-in user, or None for anonymous requests. A bad token is still a 401."""
+    if creds is None:
+        return None
+    return await get_current_user(creds)
 
 @router.post("/register")
-def register(body: RegisterBody):
+async def register(body: RegisterBody):
     try:
-        user  = register_user(body.email, body.password)
+        user  = await register_user(body.email, body.password)
         token = create_token(user["id"], user["email"])
         return {"token": token, "user": user}
+    except AuthBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/login")
-def login(body: LoginBody):
+async def login(body: LoginBody):
     try:
-        user  = login_user(body.email, body.password)
+        user  = await login_user(body.email, body.password)
         token = create_token(user["id"], user["email"])
         return {"token": token, "user": user}
+    except AuthBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
 
 @router.get("/me")
-def me(user = Depends(get_current_user)):
-    return user
\ No newline at end of file
+async def me(user = Depends(get_current_user)):
+    return user
+
+@router.get("/stats")
+def stats():
+    """Auth-path timings and principal cache counters."""
+    return {"timings": auth_timings.stats(), "principal_cache": principal_cache.stats()}
@@ -1,20 +1,53 @@
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from routes.auth import get_current_user
-from repositories.progress_repo import get_mastered, set_mastered
+from services.progress_service import load_progress_state, toggle_mastered, toggle_mastered_many
+from services.progress_writer import progress_writer
+from services.graph_service import get_compiled_async
+from services.quiz_pool import quiz_pool
 
 router = APIRouter()
 
+async def _prefetch_quizzes(delta: dict):
+    """Newly unlocked concepts are the ones a learner is about to quiz on."""
+    if delta["topic_id"] is not None and delta["unlocked_added"]:
+        compiled, added = await get_compiled_async(delta["topic_id"]), set(delta["unlocked_added"])
+        quiz_pool.prefetch(compiled.concepts[i] for i in compiled.order if i in added)
+
 class ToggleBody(BaseModel):
     concept_id: int
     mastered:   bool
+    topic_id:   int | None = None   # saves a lookup when the client already knows it
+
+class Change(BaseModel):
+    concept_id: int
+    mastered:   bool
+
+class BatchToggleBody(BaseModel):
+    topic_id: int
+    changes:  list[Change]
 
 @router.get("/{topic_id}")
-def load_progress(topic_id: int, user=Depends(get_current_user)):
-    ids = get_mastered(user["id"], topic_id)
-    return {"mastered_ids": ids}
+async def load_progress(topic_id: int, user=Depends(get_current_user)):
+    _, state = await load_progress_state(user["id"], topic_id)
+    return {"mastered_ids": sorted(state.mastered)}
 
+# Toggles stay on mysql-connector: they write under the per-(user, topic) thread locks.
 @router.post("/toggle")
-def toggle(body: ToggleBody, user=Depends(get_current_user)):
-    set_mastered(user["id"], body.concept_id, body.mastered)
-    return {"ok": True}
\ No newline at end of file
+async def toggle(body: ToggleBody, user=Depends(get_current_user)):
+    delta = await run_in_threadpool(toggle_mastered, user["id"], body.concept_id, body.mastered,
+                                    topic_id=body.topic_id)
+    await _prefetch_quizzes(delta)
+    return {"ok": True, **delta}
+
+@router.post("/toggle/batch")
+async def toggle_batch(body: BatchToggleBody, user=Depends(get_current_user)):
+    changes = [(c.concept_id, c.mastered) for c in body.changes]
+    delta = await run_in_threadpool(toggle_mastered_many, user["id"], body.topic_id, changes)
+    await _prefetch_quizzes(delta)
+    return {"ok": True, **delta}
+
+@router.get("/writer/stats")
+def writer_stats():
+    return progress_writer.stats()
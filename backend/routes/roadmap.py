@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import io
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from services.ai_service import generate_roadmap
-from graph_engine.dag import ConceptGraph
-from repositories.topic_repo import save_generated_topic, get_all_topics
+from services.graph_service import get_topic_list_body_async, TOPIC_PAGE_SIZE
+from services.roadmap_service import submit_roadmap, roadmap_jobs
+from services.job_queue import QueueFull
+from services.import_service import import_curriculum, format_from_filename, TopicExists
+from http_cache import cached_json
 
 router = APIRouter()
 
@@ -10,38 +15,58 @@ class GenerateRequest(BaseModel):
     topic: str
 
 @router.get("/")
-def list_topics():
-    return {"topics": get_all_topics()}
+async def list_topics(
+    request: Request,
+    limit: int = Query(TOPIC_PAGE_SIZE, ge=1, le=200),
+    cursor: str | None = None,
+    q: str | None = Query(None, max_length=255),
+):
+    """Newest topics first. Pass `next_cursor` back as `cursor` for the next page; `q` filters by name prefix."""
+    try:
+        etag, body = await get_topic_list_body_async(limit, cursor, q.strip() if q else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return cached_json(request, etag, body, max_age=0)     # clients revalidate; new topics show up at once
 
-@router.post("/generate")
-def generate(body: GenerateRequest):
+@router.post("/generate", status_code=202)
+async def generate(body: GenerateRequest):
+    """Queues generation and returns a job id; poll /roadmap/jobs/{job_id} for the result."""
     if not body.topic.strip():
         raise HTTPException(status_code=400, detail="Topic cannot be empty")
-
     try:
-        data = generate_roadmap(body.topic.strip())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
+        job = submit_roadmap(body.topic.strip())
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
 
-    # Validate DAG before saving
-    concepts = {c["id"]: c["name"] for c in data["concepts"]}
-    edges    = [(d["from"], d["to"]) for d in data["dependencies"]]
-    graph    = ConceptGraph(concepts, edges)
+@router.get("/jobs/stats")
+async def job_stats():
+    return roadmap_jobs.stats()
 
-    if not graph.is_valid_dag():
-        raise HTTPException(status_code=422, detail="Generated graph contains cycles — please try again")
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    """Job status. With `wait`, long-polls up to that many seconds for the job to finish."""
+    job = roadmap_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if wait and not job.finished:
+        await asyncio.wait([asyncio.wrap_future(job.future)], timeout=wait)
+    return job.to_dict()
 
-    topic_id = save_generated_topic(
-        data["topic"],
-        data["description"],
-        data["concepts"],
-        data["dependencies"]
-    )
-
-    return {
-        "topic_id":    topic_id,
-        "topic_name":  data["topic"],
-        "concept_count": len(data["concepts"]),
-        "edge_count":    len(data["dependencies"]),
-        "is_valid_dag":  True,
-    }
\ No newline at end of file
+@router.post("/import")
+async def import_topic(
+    file: UploadFile = File(...),
+    name: str = Form(...),
+    description: str = Form(""),
+):
+    """Bulk-imports a curriculum file (csv, json or jsonl) as a new topic, on a worker thread."""
+    if not name.strip():
+        raise HTTPException(status_code=400, detail="Topic name cannot be empty")
+    try:
+        fmt  = format_from_filename(file.filename)
+        text = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+        return await run_in_threadpool(import_curriculum, text, fmt, name.strip(), description)
+    except TopicExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:                 # CurriculumError, bad JSON, bad encoding
+        raise HTTPException(status_code=422, detail=str(e))
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from services.graph_service import (
-    get_learning_path,
-    get_frontier,
-    get_unlocked,
-    validate_topic_graph
+    frontier_of,
+    unlocked_of,
+    validation_of,
+    get_compiled_async,
+    get_concept_body_async,
+    get_cache_stats
 )
+from services.progress_service import get_topic_state, get_cohort_report, get_path_to, get_next_concepts
+from services.quiz_pool import quiz_pool
+from routes.auth import get_current_user, get_admin_user
+from http_cache import cached_json
 
 router = APIRouter()
 
@@ -13,37 +20,85 @@ class ProgressRequest(BaseModel):
     mastered_ids: list[int]
 
 @router.get("/{topic_id}/path")
-def learning_path(topic_id: int):
-    path = get_learning_path(topic_id)
-    if not path:
+async def learning_path(topic_id: int, request: Request):
+    compiled = await get_compiled_async(topic_id)
+    if not compiled.path:
         raise HTTPException(status_code=404, detail="Topic not found")
-    return {"topic_id": topic_id, "learning_path": path}
+    body = await compiled.aencoded("path", lambda c: {"topic_id": topic_id, "learning_path": c.path})
+    return cached_json(request, compiled.etag, body)
+
+@router.get("/{topic_id}/state")
+async def topic_state(topic_id: int, user=Depends(get_current_user)):
+    state = await get_topic_state(user["id"], topic_id)
+    if not state["learning_path"]:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    compiled, unlocked = await get_compiled_async(topic_id), set(state["unlocked"])
+    quiz_pool.prefetch(compiled.concepts[i] for i in compiled.order if i in unlocked)   # earliest first
+    return state
+
+@router.get("/{topic_id}/path-to/{concept_id}")
+async def path_to(topic_id: int, concept_id: int, user=Depends(get_current_user)):
+    """What the learner still has to master, in order, to reach `concept_id`."""
+    result = await get_path_to(user["id"], topic_id, concept_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Concept not found in topic")
+    return result
+
+@router.get("/{topic_id}/next")
+async def next_concepts(topic_id: int, limit: int = Query(5, ge=1, le=50), user=Depends(get_current_user)):
+    """Concepts you can start now, best first, ranked from the graph alone."""
+    result = await get_next_concepts(user["id"], topic_id, limit=limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    return result
+
+@router.get("/{topic_id}/cohort")
+async def cohort(topic_id: int, include_users: bool = False, user=Depends(get_admin_user)):
+    """Progress across every learner on the topic; instructors only. Streams rows on a worker thread."""
+    report = await run_in_threadpool(get_cohort_report, topic_id, include_users=include_users)
+    if not report["concepts"]:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    return report
 
 @router.post("/{topic_id}/frontier")
-def frontier(topic_id: int, body: ProgressRequest):
-    result = get_frontier(topic_id, body.mastered_ids)
+async def frontier(topic_id: int, body: ProgressRequest):
+    result = await run_in_threadpool(frontier_of, await get_compiled_async(topic_id), body.mastered_ids)
     return {"topic_id": topic_id, "frontier": result}
 
 @router.post("/{topic_id}/unlocked")
-def unlocked(topic_id: int, body: ProgressRequest):
-    result = get_unlocked(topic_id, body.mastered_ids)
+async def unlocked(topic_id: int, body: ProgressRequest):
+    result = await run_in_threadpool(unlocked_of, await get_compiled_async(topic_id), body.mastered_ids)
     return {"topic_id": topic_id, "unlocked": result}
 
 @router.get("/{topic_id}/validate")
-def validate(topic_id: int):
-    is_valid = validate_topic_graph(topic_id)
-    return {"topic_id": topic_id, "is_valid_dag": is_valid}
+async def validate(topic_id: int):
+    report = await run_in_threadpool(validation_of, await get_compiled_async(topic_id))
+    return {"topic_id": topic_id, **report}
 
 @router.get("/{topic_id}/edges")
-def get_edges(topic_id: int):
-    from repositories.graph_repo import load_graph_data
-    _, edges = load_graph_data(topic_id)
-    return {"edges": [{"from": f, "to": t} for f, t in edges]}
+async def get_edges(topic_id: int, request: Request):
+    compiled = await get_compiled_async(topic_id)
+    body = await compiled.aencoded("edges", lambda c: {"edges": [{"from": f, "to": t} for f, t in c.edges]})
+    return cached_json(request, compiled.etag, body)
+
+@router.get("/{topic_id}/layout")
+async def layout(topic_id: int):
+    """Server-computed node coordinates; cached with the compiled graph."""
+    compiled = await get_compiled_async(topic_id)
+    result = await run_in_threadpool(lambda: compiled.layout)     # computed on first use
+    if not result["positions"]:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    return {"topic_id": topic_id, **result}
 
 @router.get("/concept/{concept_id}")
-def get_concept(concept_id: int):
-    from repositories.graph_repo import get_concept_by_id
-    concept = get_concept_by_id(concept_id)
-    if not concept:
+async def get_concept(concept_id: int, request: Request):
+    """Served from memory after the first load, so a matching If-None-Match never reaches MySQL."""
+    found = await get_concept_body_async(concept_id)
+    if not found:
         raise HTTPException(status_code=404, detail="Concept not found")
-    return concept
+    etag, body = found
+    return cached_json(request, etag, body)
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return get_cache_stats()
@@ -1,17 +1,142 @@
-from groq import Groq
+from groq import Groq, AsyncGroq
+import asyncio
 import os
+import random
+import time
 from dotenv import load_dotenv
 import json
+from services.llm_cache import llm_cache, cache_key
+from metrics import llm_requests, llm_tokens, record_llm
 
 load_dotenv()
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+async_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+MODEL = "llama-3.3-70b-versatile"
+LLM_QUIZ_VARIANTS = int(os.getenv("LLM_QUIZ_VARIANTS", 0))   # 0 = never cache quiz questions
+
+def _params(messages: list[dict], max_tokens: int, temperature: float = None) -> dict:
+    params = {"model": MODEL, "max_tokens": max_tokens, "messages": messages}
+    if temperature is not None:
+        params["temperature"] = temperature
+    return params
+
+def _record_usage(usage, name: str):
+    if usage is not None:
+        llm_tokens.inc(MODEL, name, "in",  amount=getattr(usage, "prompt_tokens", 0) or 0)
+        llm_tokens.inc(MODEL, name, "out", amount=getattr(usage, "completion_tokens", 0) or 0)
+
+def _complete(messages: list[dict], max_tokens: int, temperature: float = None,
+              cache: bool = True, variant: int = None, name: str = "other") -> str:
+    """
+    One chat completion. Cached responses are keyed by model, messages and
+    sampling params; `variant` keeps several independent answers for the same prompt.
+    `name` labels the call in metrics.
+    """
+    params = _params(messages, max_tokens, temperature)
+    called = False
+
+    def call():
+        nonlocal called
+        called = True
+        start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(**params)
+        except Exception:
+            llm_requests.inc(MODEL, name, "error")
+            raise
+        finally:
+            record_llm(time.perf_counter() - start, MODEL, name)
+        llm_requests.inc(MODEL, name, "ok")
+        _record_usage(response.usage, name)
+        return response.choices[0].message.content
+
+    if not cache:
+        return call()
+    text = llm_cache.get_or_compute(cache_key(variant=variant, **params), call)
+    if not called:
+        llm_requests.inc(MODEL, name, "cached")
+    return text
+
+async def _acomplete(messages: list[dict], max_tokens: int, temperature: float = None,
+                     cache: bool = True, variant: int = None, name: str = "other") -> str:
+    """_complete on the async client. Shares the cache, and in-flight calls, with sync callers."""
+    params = _params(messages, max_tokens, temperature)
+    called = False
+
+    async def call():
+        nonlocal called
+        called = True
+        start = time.perf_counter()
+        try:
+            response = await async_client.chat.completions.create(**params)
+        except asyncio.CancelledError:
+            llm_requests.inc(MODEL, name, "cancelled")
+            raise
+        except Exception:
+            llm_requests.inc(MODEL, name, "error")
+            raise
+        finally:
+            record_llm(time.perf_counter() - start, MODEL, name)
+        llm_requests.inc(MODEL, name, "ok")
+        _record_usage(response.usage, name)
+        return response.choices[0].message.content
+
+    if not cache:
+        return await call()
+    text = await llm_cache.aget_or_compute(cache_key(variant=variant, **params), call)
+    if not called:
+        llm_requests.inc(MODEL, name, "cached")
+    return text
+
+async def _stream(messages: list[dict], max_tokens: int, temperature: float = None, name: str = "other"):
+    """
+    Yields completion text as the provider streams it. A cached answer is
+    replayed as a single chunk; a stream that runs to the end is cached.
+    Closing the generator (client went away) closes the upstream stream too.
+    """
+    params = _params(messages, max_tokens, temperature)
+    key = cache_key(variant=None, **params)
+    cached = await llm_cache.aget(key)
+    if cached is not None:
+        llm_requests.inc(MODEL, name, "cached")
+        yield cached
+        return
+
+    start, outcome = time.perf_counter(), "error"
+    try:
+        stream = await async_client.chat.completions.create(stream=True, **params)
+        parts = []
+        try:
+            async for chunk in stream:
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)   # sent on the last chunk
+                _record_usage(usage, name)
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield text
+        finally:
+            await stream.close()
+        outcome = "ok"
+    except GeneratorExit:
+        outcome = "cancelled"                    # client disconnected mid-stream
+        raise
+    finally:
+        llm_requests.inc(MODEL, name, outcome)
+        record_llm(time.perf_counter() - start, MODEL, name, mode="stream")
+    await llm_cache.aset(key, "".join(parts))
+
+def _names(names: list[str]) -> list[str]:
+    """Order and duplicates don't change the answer — normalise so they share cache entries."""
+    return sorted({n.strip() for n in names if n and n.strip()})
 
 def _mastered_context(mastered_names: list[str]) -> str:
+    mastered_names = _names(mastered_names)
     if not mastered_names:
         return "The learner has not mastered any concepts yet — they are just starting out."
     return f"The learner has already mastered: {', '.join(mastered_names)}."
 
-def explain_concept(concept_name: str, concept_description: str, mastered_names: list[str]) -> str:
+def _explain_messages(concept_name: str, concept_description: str, mastered_names: list[str]) -> list[dict]:
     prompt = f"""You are a CS tutor helping a student learn Data Structures and Algorithms.
 
 {_mastered_context(mastered_names)}
@@ -22,15 +147,16 @@ Context about this concept: {concept_description}
 Give a clear, concise explanation (3-5 sentences) tailored to what they already know.
 Use simple analogies where helpful. Do not repeat what they already know — build on it.
 Do not use markdown formatting."""
+    return [{"role": "user", "content": prompt}]
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        max_tokens=300,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
+async def explain_concept_async(concept_name: str, concept_description: str, mastered_names: list[str]) -> str:
+    return await _acomplete(_explain_messages(concept_name, concept_description, mastered_names), max_tokens=300, name="explain")
 
-def suggest_next(mastered_names: list[str], unlocked_names: list[str], frontier_names: list[str]) -> str:
+def stream_explanation(concept_name: str, concept_description: str, mastered_names: list[str]):
+    return _stream(_explain_messages(concept_name, concept_description, mastered_names), max_tokens=300, name="explain")
+
+def _suggest_messages(mastered_names: list[str], unlocked_names: list[str], frontier_names: list[str]) -> list[dict]:
+    unlocked_names, frontier_names = _names(unlocked_names), _names(frontier_names)
     prompt = f"""You are a CS tutor helping a student learn Data Structures and Algorithms.
 
 {_mastered_context(mastered_names)}
@@ -40,15 +166,27 @@ Concepts almost unlocked (one prerequisite away): {', '.join(frontier_names) if
 Give a short, motivating recommendation (3-4 sentences) on what they should learn next and why.
 Be specific — name the concept and explain why it makes sense given their current progress.
 Do not use markdown formatting."""
+    return [{"role": "user", "content": prompt}]
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        max_tokens=250,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content
+async def suggest_next_async(mastered_names: list[str], unlocked_names: list[str], frontier_names: list[str]) -> str:
+    return await _acomplete(_suggest_messages(mastered_names, unlocked_names, frontier_names), max_tokens=250, name="suggest")
 
-def generate_quiz(concept_name: str, mastered_names: list[str], previous_questions: list[str] = []) -> dict:
+def _phrase_messages(concept_name: str, completes: list[str], downstream: int) -> list[dict]:
+    completes = _names(completes)
+    reasons = f"It is the last missing prerequisite for: {', '.join(completes)}." if completes else ""
+    prompt = f"""You are a CS tutor. The learner should study "{concept_name}" next.
+{reasons}
+Mastering it moves them towards {downstream} later concept(s) in this roadmap.
+
+Write a short, motivating recommendation (2-3 sentences) that names the concept and explains why it is a good next step.
+Do not use markdown formatting."""
+    return [{"role": "user", "content": prompt}]
+
+async def phrase_suggestion_async(concept_name: str, completes: list[str], downstream: int) -> str:
+    """Puts an already-chosen next concept into words; the choice itself is made by the graph ranking."""
+    return await _acomplete(_phrase_messages(concept_name, completes, downstream), max_tokens=150, name="suggest_phrase")
+
+def _quiz_messages(concept_name: str, mastered_names: list[str], previous_questions: list[str]) -> list[dict]:
     prev_context = ""
     if previous_questions:
         prev_context = f"\nDo NOT repeat these questions:\n" + "\n".join(f"- {q}" for q in previous_questions)
@@ -67,15 +205,19 @@ C: <option C>
 D: <option D>
 ANSWER: <just the letter, A B C or D>
 EXPLANATION: <one sentence explaining why>"""
+    return [{"role": "user", "content": prompt}]
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        max_tokens=300,
-        temperature=0.9,
-        messages=[{"role": "user", "content": prompt}]
-    )
+def _quiz_options() -> dict:
+    # High temperature on purpose: cache only if a variant pool is configured
+    return {
+        "max_tokens":  300,
+        "temperature": 0.9,
+        "cache":       LLM_QUIZ_VARIANTS > 0,
+        "variant":     random.randrange(LLM_QUIZ_VARIANTS) if LLM_QUIZ_VARIANTS else None,
+        "name":        "quiz",
+    }
 
-    text = response.choices[0].message.content
+def _parse_quiz(text: str) -> dict:
     lines = {l.split(":")[0].strip(): ":".join(l.split(":")[1:]).strip()
              for l in text.strip().split("\n") if ":" in l}
 
@@ -86,28 +228,55 @@ EXPLANATION: <one sentence explaining why>"""
         "explanation": lines.get("EXPLANATION", ""),
     }
 
-def answer_question(concept_name: str, explanation: str, question: str, mastered_names: list[str], history: list[dict]) -> str:
-    messages = [
-        {
-            "role": "system",
-            "content": f"""You are a CS tutor helping a student learn Data Structures and Algorithms.
+def generate_quiz(concept_name: str, mastered_names: list[str], previous_questions: list[str] = []) -> dict:
+    return _parse_quiz(_complete(_quiz_messages(concept_name, mastered_names, previous_questions), **_quiz_options()))
+
+async def generate_quiz_async(concept_name: str, mastered_names: list[str], previous_questions: list[str] = []) -> dict:
+    return _parse_quiz(await _acomplete(_quiz_messages(concept_name, mastered_names, previous_questions), **_quiz_options()))
+
+def chat_system_prompt(concept_name: str, explanation: str, mastered_names: list[str]) -> str:
+    return f"""You are a CS tutor helping a student learn Data Structures and Algorithms.
 {_mastered_context(mastered_names)}
 You just explained: "{concept_name}".
 Your explanation was: {explanation}
 Answer follow-up questions clearly and concisely. Do not use markdown formatting."""
-        }
-    ]
+
+def _chat_messages(concept_name: str, explanation: str, question: str, mastered_names: list[str], history: list[dict]) -> list[dict]:
+    messages = [{"role": "system", "content": chat_system_prompt(concept_name, explanation, mastered_names)}]
     for h in history:
         messages.append({"role": h["role"], "content": h["content"]})
     messages.append({"role": "user", "content": question})
+    return messages
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        max_tokens=300,
-        temperature=0.7,
-        messages=messages
-    )
-    return response.choices[0].message.content
+async def answer_question_async(concept_name: str, explanation: str, question: str, mastered_names: list[str], history: list[dict]) -> str:
+    messages = _chat_messages(concept_name, explanation, question, mastered_names, history)
+    return await _acomplete(messages, max_tokens=300, temperature=0.7, name="chat")
+
+def stream_answer(concept_name: str, explanation: str, question: str, mastered_names: list[str], history: list[dict]):
+    messages = _chat_messages(concept_name, explanation, question, mastered_names, history)
+    return _stream(messages, max_tokens=300, temperature=0.7, name="chat")
+
+async def answer_messages_async(messages: list[dict]) -> str:
+    """Chat completion for a prompt a chat session already assembled."""
+    return await _acomplete(messages, max_tokens=300, temperature=0.7, name="chat")
+
+def stream_messages(messages: list[dict]):
+    return _stream(messages, max_tokens=300, temperature=0.7, name="chat")
+
+def _summary_messages(summary: str, turns: list[dict]) -> list[dict]:
+    transcript = "\n".join(f"{t['role'].upper()}: {t['content']}" for t in turns)
+    previous = f"Summary so far:\n{summary}\n\n" if summary else ""
+    prompt = f"""Summarise this tutoring conversation so the tutor can continue it.
+Keep what the student asked, what was answered, and any misunderstandings. Be brief; plain text only.
+
+{previous}New messages:
+{transcript}"""
+    return [{"role": "user", "content": prompt}]
+
+async def summarize_conversation_async(summary: str, turns: list[dict], max_tokens: int = 200) -> str:
+    """Folds older chat turns into the running summary of a tutoring conversation."""
+    return (await _acomplete(_summary_messages(summary, turns), max_tokens=max_tokens, temperature=0.2,
+                             cache=False, name="chat_summary")).strip()
 
 def generate_roadmap(topic: str) -> dict:
     prompt = f"""You are a curriculum designer creating a learning roadmap for: "{topic}"
@@ -140,14 +309,7 @@ Rules:
 - start with 2-3 foundational concepts that have no prerequisites
 - build logically so each concept genuinely needs its prerequisites"""
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        max_tokens=2000,
-        temperature=0.3,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    text = response.choices[0].message.content.strip()
+    text = _complete([{"role": "user", "content": prompt}], max_tokens=2000, temperature=0.3, cache=False, name="roadmap").strip()
     # Strip markdown code fences if present
     if text.startswith("```"):
         text = text.split("```")[1]
@@ -1,7 +1,13 @@
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from database import get_connection
+from concurrent.futures import ThreadPoolExecutor
+from database import async_connection, fetch_one, execute
+from services.ttl_cache import TTLCache, MISSING
+from metrics import instrument_db, auth_duration
+import asyncio
+import threading
+import time
 import os
 from dotenv import load_dotenv
 
@@ -11,14 +17,62 @@ SECRET     = os.getenv("JWT_SECRET", "changeme")
 ALGORITHM  = os.getenv("JWT_ALGORITHM", "HS256")
 EXPIRE_MIN = int(os.getenv("JWT_EXPIRE_MINUTES", 10080))
 
+AUTH_CACHE_SIZE       = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL        = int(os.getenv("AUTH_CACHE_TTL", 60))             # seconds
+AUTH_HASH_WORKERS     = int(os.getenv("AUTH_HASH_WORKERS", 2))
+AUTH_HASH_MAX_PENDING = int(os.getenv("AUTH_HASH_MAX_PENDING", 64))
+ADMIN_EMAILS          = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
 pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class AuthBusy(Exception):
+    pass
+
+class AuthTimings:
+    """Call count, total and max wall time per auth-path operation."""
+    def __init__(self):
+        self._ops  = {}
+        self._lock = threading.Lock()
+
+    def record(self, op: str, seconds: float):
+        with self._lock:
+            count, total, worst = self._ops.get(op, (0, 0.0, 0.0))
+            self._ops[op] = (count + 1, total + seconds, max(worst, seconds))
+        auth_duration.observe(seconds, op)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                op: {"count": c, "avg_ms": round(t / c * 1000, 3), "max_ms": round(w * 1000, 3)}
+                for op, (c, t, w) in self._ops.items()
+            }
+
+auth_timings = AuthTimings()
+
+# bcrypt is deliberately slow; it runs on its own small pool so a burst of
+# logins queues here instead of occupying the request threadpool.
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots    = threading.BoundedSemaphore(AUTH_HASH_MAX_PENDING)
+
+async def _run_hasher(op: str, fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise AuthBusy("Too many sign-in attempts in progress — please try again shortly")
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_slots.release()
+        auth_timings.record(op, time.perf_counter() - start)
+
 def hash_password(password: str) -> str:
     return pwd_ctx.hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_ctx.verify(plain, hashed)
 
+def shutdown_hasher():
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
 def create_token(user_id: int, email: str) -> str:
     payload = {
         "sub":   str(user_id),
@@ -30,43 +84,74 @@ def create_token(user_id: int, email: str) -> str:
 def decode_token(token: str) -> dict:
     return jwt.decode(token, SECRET, algorithms=[ALGORITHM])
 
-def register_user(email: str, password: str) -> dict:
+# token -> user dict. Entries never outlive the token's own expiry.
+principal_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+async def verify_token(token: str, conn=None) -> dict | None:
+    """
+    The user a bearer token belongs to, or None if the user no longer exists.
+    Raises JWTError for invalid or expired tokens. Verified principals are
+    cached for AUTH_CACHE_TTL seconds, so repeat requests skip MySQL.
+    """
+    start = time.perf_counter()
+    user = principal_cache.get(token)
+    if user is not MISSING:
+        auth_timings.record("token_cache_hit", time.perf_counter() - start)
+        return user
+
+    payload = decode_token(token)
+    user    = await get_user_by_id(int(payload["sub"]), conn=conn)
+    if user:
+        ttl = min(AUTH_CACHE_TTL, payload["exp"] - time.time())
+        if ttl > 0:
+            principal_cache.set(token, user, ttl)
+    auth_timings.record("token_cache_miss", time.perf_counter() - start)
+    return user
+
+def is_admin(user: dict) -> bool:
+    """Instructors / admins are configured by email in ADMIN_EMAILS."""
+    return bool(user) and user["email"].lower() in ADMIN_EMAILS
+
+def _check_password(password: str):
     if len(password.encode('utf-8')) > 72:
         raise ValueError("Password must be 72 characters or fewer")
     if len(password) < 8:
         raise ValueError("Password must be at least 8 characters")
 
-def register_user(email: str, password: str) -> dict:
-    conn   = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-    if cursor.fetchone():
-        cursor.close(); conn.close()
-        raise ValueError("Email already registered")
-    hashed = hash_password(password)
-    cursor.execute(
-        "INSERT INTO users (email, password_hash) VALUES (%s, %s)",
-        (email, hashed)
-    )
-    conn.commit()
-    user_id = cursor.lastrowid
-    cursor.close(); conn.close()
+@instrument_db
+async def _find_user_by_email(email: str, conn=None) -> dict | None:
+    async with async_connection(conn) as conn:
+        return await fetch_one(conn, "SELECT id, email, password_hash FROM users WHERE email = %s",
+                               (email,), dictionary=True)
+
+@instrument_db
+async def _insert_user(email: str, password_hash: str, conn=None) -> dict:
+    async with async_connection(conn) as conn:
+        user_id = await execute(conn, "INSERT INTO users (email, password_hash) VALUES (%s, %s)",
+                                (email, password_hash))
     return {"id": user_id, "email": email}
 
-def login_user(email: str, password: str) -> dict:
-    conn   = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT id, email, password_hash FROM users WHERE email = %s", (email,))
-    user = cursor.fetchone()
-    cursor.close(); conn.close()
-    if not user or not verify_password(password, user["password_hash"]):
+async def register_user(email: str, password: str) -> dict:
+    """
+    DB work runs on the async pool, bcrypt on the hash executor.
+    The lookup and the insert each borrow a pooled connection and return it,
+    so none is held while the request waits for a hash worker.
+    """
+    _check_password(password)
+    if await _find_user_by_email(email):
+        raise ValueError("Email already registered")
+    hashed = await _run_hasher("hash_password", hash_password, password)
+    return await _insert_user(email, hashed)
+
+async def login_user(email: str, password: str) -> dict:
+    """Like register_user, no connection is held across the bcrypt queue."""
+    user = await _find_user_by_email(email)
+    if not user or not await _run_hasher("verify_password", verify_password, password, user["password_hash"]):
         raise ValueError("Invalid email or password")
     return {"id": user["id"], "email": user["email"]}
 
-def get_user_by_id(user_id: int) -> dict:
-    conn   = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT id, email, created_at FROM users WHERE id = %s", (user_id,))
-    user = cursor.fetchone()
-    cursor.close(); conn.close()
-    return user
\ No newline at end of file
+@instrument_db
+async def get_user_by_id(user_id: int, conn=None) -> dict:
+    async with async_connection(conn) as conn:
+        return await fetch_one(conn, "SELECT id, email, created_at FROM users WHERE id = %s",
+                               (user_id,), dictionary=True)
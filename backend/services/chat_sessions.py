@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import uuid
+from dotenv import load_dotenv
+
+from services.ai_service import chat_system_prompt, answer_messages_async, stream_messages, summarize_conversation_async
+from services.ttl_cache import TTLCache, MISSING
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", 1200))   # budget for verbatim turns
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", 200))    # cap on the rolling summary
+CHAT_SESSION_TTL    = int(os.getenv("CHAT_SESSION_TTL", 3600))      # seconds idle before a session is dropped
+CHAT_SESSION_MAX    = int(os.getenv("CHAT_SESSION_MAX", 10000))
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token plus per-message overhead; close enough for budgeting."""
+    return len(text) // 4 + 4
+
+class ChatSession:
+    """
+    One follow-up conversation about an explained concept. The system prompt
+    is built once; turns beyond `budget` tokens are folded, oldest first, into
+    a rolling summary, so every prompt stays bounded whatever the conversation length.
+    Used from the event loop only: the lock serialises compaction, not threads.
+    """
+    def __init__(self, concept_name: str, explanation: str, mastered_names: list[str],
+                 budget: int = CHAT_HISTORY_TOKENS, summarizer=summarize_conversation_async):
+        self.system     = chat_system_prompt(concept_name, explanation, mastered_names)
+        self.budget     = budget
+        self.summary    = ""
+        self.turns      = []              # [{"role", "content"}], newest last
+        self._summarize = summarizer
+        self._lock      = asyncio.Lock()
+
+    async def _compact(self):
+        """Keeps the newest turns within half the budget and summarises the rest."""
+        if sum(estimate_tokens(t["content"]) for t in self.turns) <= self.budget:
+            return
+        kept, used = 0, 0
+        for t in reversed(self.turns):
+            used += estimate_tokens(t["content"])
+            if used > self.budget // 2:
+                break
+            kept += 1
+        folded, self.turns = self.turns[:len(self.turns) - kept], self.turns[len(self.turns) - kept:]
+        try:
+            self.summary = await self._summarize(self.summary, folded, max_tokens=CHAT_SUMMARY_TOKENS)
+        except Exception:                 # the folded turns are lost, but the prompt stays bounded
+            logger.exception("Chat summary failed; dropping %d turns", len(folded))
+
+    async def prompt(self, question: str) -> list[dict]:
+        """Messages for the next follow-up: system context, summary, recent turns, question."""
+        async with self._lock:
+            await self._compact()
+            system = self.system
+            if self.summary:
+                system += f"\nEarlier in this conversation: {self.summary}"
+            return [{"role": "system", "content": system}, *self.turns, {"role": "user", "content": question}]
+
+    def record(self, question: str, answer: str):
+        self.turns.append({"role": "user", "content": question})
+        self.turns.append({"role": "assistant", "content": answer})
+
+chat_sessions = TTLCache(CHAT_SESSION_MAX, CHAT_SESSION_TTL)    # session id -> ChatSession
+
+def start_session(concept_name: str, explanation: str, mastered_names: list[str]) -> str:
+    session_id = uuid.uuid4().hex
+    chat_sessions.set(session_id, ChatSession(concept_name, explanation, mastered_names))
+    return session_id
+
+def get_session(session_id: str) -> ChatSession | None:
+    session = chat_sessions.get(session_id)
+    if session is MISSING:
+        return None
+    chat_sessions.set(session_id, session)        # sliding expiry
+    return session
+
+async def ask(session: ChatSession, question: str) -> str:
+    answer = await answer_messages_async(await session.prompt(question))
+    session.record(question, answer)
+    return answer
+
+async def stream_ask(session: ChatSession, question: str):
+    """Streams the answer; the turn is recorded only if the stream runs to the end."""
+    messages = await session.prompt(question)      # may call the summariser
+    chunks, parts = stream_messages(messages), []
+    try:
+        async for text in chunks:
+            parts.append(text)
+            yield text
+    finally:
+        await chunks.aclose()
+    session.record(question, "".join(parts))
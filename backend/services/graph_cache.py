@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+from graph_engine.dag import ConceptGraph
+from graph_engine.compact import CompactConceptGraph
+from graph_engine.mastery_bitmap import MasteryBitmap
+from graph_engine.layout import hierarchical_layout
+from graph_engine.reachability import ReachabilityIndex
+from repositories.graph_repo import load_graph_data, load_graph_data_async, get_concept_difficulties
+from http_cache import json_bytes, etag_of
+from metrics import timed, graph_duration, register, Gauge
+
+load_dotenv()
+
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", 256))
+GRAPH_ENGINE     = os.getenv("GRAPH_ENGINE", "dict")   # "dict" (ConceptGraph) or "compact" (CSR arrays)
+# Bitsets cost about n^2/4 bytes per topic (~1 MB at 2000) and each cached topic may hold them;
+# larger topics walk the graph per query
+REACHABILITY_MAX_NODES = int(os.getenv("REACHABILITY_MAX_NODES", 2000))
+
+ENGINES = {"dict": ConceptGraph, "compact": CompactConceptGraph}
+
+class CompiledGraph:
+    """
+    A topic graph built once and shared by every request for that topic.
+    Treat it as read-only: topological order and validity are computed up front,
+    the engine already carries forward and reverse adjacency.
+    """
+    def __init__(self, topic_id: int, concepts: dict, edges: list, engine=ConceptGraph):
+        self.topic_id = topic_id
+        self.concepts = concepts
+        self.edges    = edges
+        with timed(graph_duration, "compile", engine.__name__):
+            self.graph    = engine(concepts, edges)
+            self.order    = self.graph.topological_sort()
+            self.validation = self.graph.validate()
+        self.is_valid = self.validation["is_valid_dag"]
+        self.path     = self.named(self.order)
+        # Content hash of concepts and edges: equal graphs share it, any change alters it.
+        # Hashed here so it is paid inside the compile, off the event loop for aget().
+        self.etag     = etag_of(json_bytes([sorted(self.concepts.items()), sorted(self.edges)]))
+        self._encoded = {}
+
+    def encoded(self, key: str, build) -> bytes:
+        """JSON body `build(self)` for `key`, encoded once per topic version."""
+        body = self._encoded.get(key)
+        if body is None:
+            body = self._encoded[key] = json_bytes(build(self))
+        return body
+
+    async def aencoded(self, key: str, build) -> bytes:
+        """encoded() for async routes: the first encode runs on a worker thread."""
+        body = self._encoded.get(key)
+        return body if body is not None else await run_in_threadpool(self.encoded, key, build)
+
+    @cached_property
+    def layout(self) -> dict:
+        """Node coordinates, computed on first use and kept for this topic version."""
+        with timed(graph_duration, "layout", type(self.graph).__name__):
+            return hierarchical_layout(self.graph, self.order)
+
+    @cached_property
+    def reachability(self) -> ReachabilityIndex:
+        """Ancestor / descendant bitsets, built on first use and kept for this topic version."""
+        with timed(graph_duration, "reachability", type(self.graph).__name__):
+            return ReachabilityIndex(self.graph, self.order, REACHABILITY_MAX_NODES)
+
+    @cached_property
+    def difficulty(self) -> dict:
+        """{concept_id: difficulty_level}, loaded on first use; only the ranking needs it."""
+        return get_concept_difficulties(self.topic_id)
+
+    @cached_property
+    def mastery_bitmap(self) -> MasteryBitmap:
+        return MasteryBitmap(self.concepts)
+
+    def named(self, ids) -> list:
+        return [{"id": i, "name": self.concepts[i]} for i in ids]
+
+class GraphCache:
+    """
+    LRU cache of CompiledGraph keyed by topic_id.
+    Unknown (empty) topics are never cached — their id may be handed out later.
+    """
+    def __init__(self, max_size: int = GRAPH_CACHE_SIZE, loader=load_graph_data, engine=GRAPH_ENGINE,
+                 async_loader=load_graph_data_async):
+        self.max_size = max_size
+        self.loader   = loader
+        self.async_loader = async_loader
+        self.engine   = ENGINES[engine]
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+        self._generation = 0   # bumped on invalidation so in-flight loads don't store stale graphs
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def _lookup(self, topic_id: int) -> tuple:
+        """(compiled, None) on a hit, (None, generation) on a miss."""
+        with self._lock:
+            compiled = self._entries.get(topic_id)
+            if compiled is not None:
+                self._entries.move_to_end(topic_id)
+                self.hits += 1
+                return compiled, None
+            self.misses += 1
+            return None, self._generation
+
+    def get(self, topic_id: int) -> CompiledGraph:
+        compiled, generation = self._lookup(topic_id)
+        if compiled is not None:
+            return compiled
+        concepts, edges = self.loader(topic_id)
+        return self._store(topic_id, CompiledGraph(topic_id, concepts, edges, self.engine), generation)
+
+    async def aget(self, topic_id: int) -> CompiledGraph:
+        """get() for async routes: loads over the async pool and compiles on a worker thread."""
+        compiled, generation = self._lookup(topic_id)
+        if compiled is not None:
+            return compiled
+        concepts, edges = await self.async_loader(topic_id)
+        compiled = await run_in_threadpool(CompiledGraph, topic_id, concepts, edges, self.engine)
+        return self._store(topic_id, compiled, generation)
+
+    def _store(self, topic_id: int, compiled: CompiledGraph, generation: int) -> CompiledGraph:
+        if not compiled.concepts:
+            return compiled
+        with self._lock:
+            if generation == self._generation:
+                self._entries[topic_id] = compiled
+                self._entries.move_to_end(topic_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return compiled
+
+    def invalidate(self, topic_id: int):
+        with self._lock:
+            self._entries.pop(topic_id, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size":      len(self._entries),
+                "max_size":  self.max_size,
+                "engine":    self.engine.__name__,
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "evictions": self.evictions,
+                "hit_rate":  round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+graph_cache = GraphCache()
+
+register(Gauge("graph_cache", "Compiled graph cache counters", ("stat",),
+               lambda: {(k,): v for k, v in graph_cache.stats().items() if k != "engine"}))
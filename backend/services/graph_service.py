@@ -1,29 +1,92 @@
 import sys
 import os
+import base64
+import json
+from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from graph_engine.dag import ConceptGraph
-from repositories.graph_repo import load_graph_data
-
-def get_learning_path(topic_id: int):
-    concepts, edges = load_graph_data(topic_id)
-    g = ConceptGraph(concepts, edges)
-    ordered_ids = g.topological_sort()
-    return [{"id": i, "name": concepts[i]} for i in ordered_ids]
-
-def get_frontier(topic_id: int, mastered_ids: list):
-    concepts, edges = load_graph_data(topic_id)
-    g = ConceptGraph(concepts, edges)
-    frontier_ids = g.get_frontier(set(mastered_ids))
-    return [{"id": i, "name": concepts[i]} for i in frontier_ids]
-
-def get_unlocked(topic_id: int, mastered_ids: list):
-    concepts, edges = load_graph_data(topic_id)
-    g = ConceptGraph(concepts, edges)
-    unlocked_ids = g.get_unlocked(set(mastered_ids))
-    return [{"id": i, "name": concepts[i]} for i in unlocked_ids]
-
-def validate_topic_graph(topic_id: int):
-    concepts, edges = load_graph_data(topic_id)
-    g = ConceptGraph(concepts, edges)
-    return g.is_valid_dag()
\ No newline at end of file
+from dotenv import load_dotenv
+
+from services.graph_cache import graph_cache
+from services.ttl_cache import TTLCache, MISSING
+from repositories.graph_repo import get_concept_by_id_async
+from repositories.topic_repo import list_topics_async
+from http_cache import json_bytes, etag_of
+from metrics import timed, graph_duration
+
+load_dotenv()
+
+CONCEPT_CACHE_SIZE = int(os.getenv("CONCEPT_CACHE_SIZE", 5000))
+CONCEPT_CACHE_TTL  = int(os.getenv("CONCEPT_CACHE_TTL", 3600))    # seconds
+TOPIC_LIST_TTL     = int(os.getenv("TOPIC_LIST_TTL", 30))         # seconds; bounds staleness across workers
+TOPIC_PAGE_SIZE    = int(os.getenv("TOPIC_PAGE_SIZE", 50))
+
+# Encoded JSON bodies with their ETags, so conditional requests are answered from memory
+concept_cache    = TTLCache(CONCEPT_CACHE_SIZE, CONCEPT_CACHE_TTL)   # concept_id -> (topic_id, etag, body)
+topic_list_cache = TTLCache(256, TOPIC_LIST_TTL)                     # (limit, cursor, prefix) -> (etag, body)
+
+async def get_compiled_async(topic_id: int):
+    return await graph_cache.aget(topic_id)
+
+def frontier_of(compiled, mastered_ids: list):
+    with timed(graph_duration, "frontier", type(compiled.graph).__name__):
+        return compiled.named(compiled.graph.get_frontier(set(mastered_ids)))
+
+def unlocked_of(compiled, mastered_ids: list):
+    with timed(graph_duration, "unlocked", type(compiled.graph).__name__):
+        return compiled.named(compiled.graph.get_unlocked(set(mastered_ids)))
+
+def validation_of(compiled):
+    report = compiled.validation
+    return {
+        "is_valid_dag":   report["is_valid_dag"],
+        "cycle":          compiled.named(report["cycle"]) if report["cycle"] else None,
+        "dangling_edges": [{"from": f, "to": t} for f, t in report["dangling_edges"]],
+    }
+
+async def get_concept_body_async(concept_id: int):
+    """(etag, JSON body) for a concept's detail, or None if it does not exist."""
+    entry = concept_cache.get(concept_id)
+    if entry is MISSING:
+        concept = await get_concept_by_id_async(concept_id)
+        if not concept:
+            return None
+        body  = json_bytes(concept)
+        entry = (concept["topic_id"], etag_of(body), body)
+        concept_cache.set(concept_id, entry)
+    return entry[1:]
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"].isoformat(), row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, id) from an opaque page cursor; ValueError if it is malformed."""
+    try:
+        created_at, topic_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(topic_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+async def get_topic_list_body_async(limit: int = TOPIC_PAGE_SIZE, cursor: str = None, prefix: str = None):
+    """(etag, JSON body) for one page of the topic list: {"topics": [...], "next_cursor"}."""
+    key = (limit, cursor, prefix or None)
+    entry = topic_list_cache.get(key)
+    if entry is MISSING:
+        after = decode_cursor(cursor) if cursor else None
+        rows  = await list_topics_async(limit + 1, after=after, prefix=prefix)
+        more  = len(rows) > limit
+        rows  = rows[:limit]
+        body  = json_bytes({"topics": rows, "next_cursor": encode_cursor(rows[-1]) if more else None})
+        entry = (etag_of(body), body)
+        topic_list_cache.set(key, entry)
+    return entry
+
+def invalidate_topic(topic_id: int):
+    """Call after a topic's concepts or dependencies are written."""
+    graph_cache.invalidate(topic_id)
+    concept_cache.discard_where(lambda concept_id, entry: entry[0] == topic_id)
+    topic_list_cache.clear()
+
+def get_cache_stats():
+    return graph_cache.stats()
@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+from itertools import islice
+from mysql.connector import IntegrityError, errorcode
+
+from database import connection
+from graph_engine.dag import ConceptGraph
+from repositories.topic_repo import insert_topic, insert_concepts, insert_dependencies, set_topic_counts
+from services.graph_service import invalidate_topic
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+
+class CurriculumError(ValueError):
+    pass
+
+class TopicExists(CurriculumError):
+    pass
+
+def _split_ids(value) -> list:
+    """Prerequisites as a list, or a ';' / '|' separated string (CSV)."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [v.strip() for v in str(value).replace("|", ";").split(";") if v.strip()]
+
+def _concept(record: dict, line: int) -> dict:
+    if record.get("id") in (None, "") or not record.get("name"):
+        raise CurriculumError(f"Record {line}: 'id' and 'name' are required")
+    difficulty = record.get("difficulty") or record.get("difficulty_level")
+    resources = record.get("resources")
+    if isinstance(resources, list):
+        resources = ", ".join(resources)
+    return {
+        "id":            str(record["id"]),
+        "name":          record["name"],
+        "description":   record.get("description"),
+        "difficulty":    int(difficulty) if difficulty not in (None, "") else None,
+        "resources":     resources or None,
+        "prerequisites": _split_ids(record.get("prerequisites")),
+    }
+
+def _iter_jsonl(text):
+    for line, raw in enumerate(text, 1):
+        if raw.strip():
+            yield _concept(json.loads(raw), line)
+
+def _iter_json_array(text, read_size: int = 1 << 16):
+    """Top-level JSON array of concept objects, decoded one element at a time."""
+    decoder = json.JSONDecoder()
+    buf, pos, started, count = "", 0, False, 0
+    while True:
+        chunk = text.read(read_size)
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if not started and pos < len(buf):
+                if buf[pos] != "[":
+                    raise CurriculumError("JSON curricula must be a top-level array of concepts")
+                started, pos = True, pos + 1
+                continue
+            if pos >= len(buf):
+                break                                   # need more input
+            if buf[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise CurriculumError("Invalid or truncated JSON curriculum")
+                break                                   # need more input
+            count += 1
+            yield _concept(record, count)
+            pos = end
+        if not chunk:
+            if started:
+                raise CurriculumError("Invalid or truncated JSON curriculum")
+            return
+
+def _iter_csv(text):
+    for line, row in enumerate(csv.DictReader(text), 2):
+        yield _concept(row, line)
+
+READERS = {"jsonl": _iter_jsonl, "ndjson": _iter_jsonl, "json": _iter_json_array, "csv": _iter_csv}
+
+def format_from_filename(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lstrip(".").lower()
+    if ext not in READERS:
+        raise CurriculumError(f"Unsupported curriculum format '{ext}' — use csv, json or jsonl")
+    return ext
+
+def import_curriculum(text, fmt: str, topic_name: str, description: str = "",
+                      chunk_size: int = IMPORT_CHUNK_SIZE, conn=None) -> dict:
+    """
+    Streams a curriculum file into a new topic inside one transaction.
+    Concepts are inserted chunk by chunk as they are read; only the id mapping
+    and the prerequisite pairs are kept in memory. The DAG is validated at the
+    end and the whole import is rolled back if it has a cycle or unknown ids.
+
+    text: a text file object (CSV with id,name,description,difficulty,prerequisites,
+          JSON Lines, or a top-level JSON array of the same fields)
+    """
+    records = READERS[fmt](text)
+    id_map, prereqs = {}, []
+
+    with connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            try:
+                topic_id = insert_topic(cursor, topic_name, description)
+            except IntegrityError as e:             # topics.name is UNIQUE
+                if e.errno != errorcode.ER_DUP_ENTRY:
+                    raise
+                raise TopicExists(f"A topic named '{topic_name}' already exists") from None
+            last_id = 0
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                db_ids = insert_concepts(cursor, topic_id, chunk, after_id=last_id)
+                for c, db_id in zip(chunk, db_ids):
+                    if c["id"] in id_map:
+                        raise CurriculumError(f"Duplicate concept id '{c['id']}'")
+                    id_map[c["id"]] = db_id
+                    prereqs.extend((p, c["id"]) for p in c["prerequisites"])
+                last_id = db_ids[-1]
+
+            if not id_map:
+                raise CurriculumError("Curriculum has no concepts")
+
+            report = ConceptGraph(dict.fromkeys(id_map), prereqs).validate()
+            if report["dangling_edges"]:
+                f, t = report["dangling_edges"][0]
+                raise CurriculumError(f"Concept '{t}' lists unknown prerequisite '{f}'")
+            if not report["is_valid_dag"]:
+                raise CurriculumError(f"Curriculum contains a cycle: {' → '.join(report['cycle'])}")
+
+            edges = [(id_map[f], id_map[t]) for f, t in prereqs]
+            for i in range(0, len(edges), chunk_size):
+                insert_dependencies(cursor, edges[i:i + chunk_size])
+            set_topic_counts(cursor, topic_id, len(id_map), len(edges))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    invalidate_topic(topic_id)
+    return {"topic_id": topic_id, "concept_count": len(id_map), "edge_count": len(prereqs)}
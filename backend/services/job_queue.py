@@ -0,0 +1,110 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+class QueueFull(Exception):
+    pass
+
+class JobFailed(Exception):
+    """Raise from a job to fail it with a client-facing message and HTTP status."""
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+class Job:
+    def __init__(self, key: str):
+        self.id          = uuid.uuid4().hex
+        self.key         = key
+        self.status      = "queued"       # queued -> running -> done | failed
+        self.result      = None
+        self.error       = None
+        self.status_code = None
+        self.created_at  = time.time()
+        self.finished_at = None
+        self.future      = None           # concurrent.futures.Future; never holds an exception
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id":      self.id,
+            "status":      self.status,
+            "result":      self.result,
+            "error":       self.error,
+            "status_code": self.status_code,
+            "created_at":  self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobQueue:
+    """
+    Runs jobs on a bounded thread pool. Jobs submitted under the same key while
+    one is still queued or running share that job. Finished jobs are kept for
+    `retention` seconds so clients can poll their result.
+    """
+    def __init__(self, name: str, workers: int, max_pending: int, retention: float):
+        self.max_pending = max_pending
+        self.retention   = retention
+        self._executor   = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._jobs       = {}             # job id -> Job
+        self._active     = {}             # key -> Job still queued or running
+        self._lock       = threading.Lock()
+        self.workers     = workers
+        self.submitted   = 0
+        self.deduplicated = 0
+
+    def submit(self, key: str, fn, *args) -> Job:
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                self.deduplicated += 1
+                return job
+            self._prune(time.time())
+            if len(self._active) >= self.max_pending:
+                raise QueueFull("Too many jobs in progress — please try again shortly")
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._active[key]  = job
+            self.submitted += 1
+            job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job: Job, fn, args):
+        job.status = "running"
+        try:
+            job.result, status = fn(*args), "done"
+        except JobFailed as e:
+            job.error, job.status_code, status = str(e), e.status_code, "failed"
+        except Exception as e:
+            job.error, job.status_code, status = str(e), 500, "failed"
+        job.finished_at = time.time()
+        job.status      = status          # set last: pollers read status without the lock
+        with self._lock:
+            if self._active.get(job.key) is job:
+                del self._active[job.key]
+
+    def _prune(self, now: float):
+        expired = [j.id for j in self._jobs.values() if j.finished and now - j.finished_at >= self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers":      self.workers,
+                "active":       len(self._active),
+                "retained":     len(self._jobs),
+                "max_pending":  self.max_pending,
+                "submitted":    self.submitted,
+                "deduplicated": self.deduplicated,
+            }
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+from services.ttl_cache import TTLCache, MISSING
+
+load_dotenv()
+
+LLM_CACHE_SIZE          = int(os.getenv("LLM_CACHE_SIZE", 2000))
+LLM_CACHE_TTL           = int(os.getenv("LLM_CACHE_TTL", 86400))        # seconds
+LLM_CACHE_SQLITE_PATH   = os.getenv("LLM_CACHE_SQLITE_PATH", "")        # empty = memory only
+LLM_CACHE_DISK_MAX_ROWS = int(os.getenv("LLM_CACHE_DISK_MAX_ROWS", 100000))
+
+def cache_key(**params) -> str:
+    """Stable key over everything that changes a completion: model, messages, sampling params."""
+    blob = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class SQLiteTier:
+    """Optional on-disk tier that survives restarts. Bounded to `max_rows`, oldest pruned first."""
+    def __init__(self, path: str, max_rows: int = LLM_CACHE_DISK_MAX_ROWS):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key        TEXT PRIMARY KEY,
+                value      TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        self._writes = 0
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return MISSING
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._prune(now)
+            self._db.commit()
+
+    def _prune(self, now: float):
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._db.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_rows,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+
+class LLMCache:
+    """
+    Memory (LRU + TTL) in front of an optional SQLite tier, plus single-flight:
+    concurrent callers asking for the same key share one upstream call.
+    Failed calls are not cached; every waiter sees the same exception.
+    """
+    def __init__(self, max_size: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL,
+                 sqlite_path: str = LLM_CACHE_SQLITE_PATH):
+        self.ttl      = ttl
+        self.memory   = TTLCache(max_size, ttl)
+        self.disk     = SQLiteTier(sqlite_path) if sqlite_path else None
+        self._inflight = {}              # key -> Future
+        self._tasks    = set()           # detached async upstream calls, referenced until done
+        self._lock     = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced      = 0
+
+    def _join(self, key: str) -> tuple:
+        """(future, leader): the in-flight call for `key`, started by this caller if `leader`."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                return future, True
+            self.coalesced += 1
+            return future, False
+
+    def _stored(self, key: str):
+        value = self.disk.get(key) if self.disk else MISSING
+        if value is MISSING:
+            with self._lock:
+                self.upstream_calls += 1
+        return value
+
+    def _settle(self, key: str, future: Future, value):
+        self.memory.set(key, value)
+        future.set_result(value)
+
+    def get_or_compute(self, key: str, compute):
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            value = self._stored(key)
+            if value is MISSING:
+                value = compute()
+                if self.disk:
+                    self.disk.set(key, value, self.ttl)
+            self._settle(key, future, value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def aget_or_compute(self, key: str, compute):
+        """
+        get_or_compute for a coroutine function `compute`; waiters await rather
+        than block. Sync and async callers join the same in-flight call.
+        The upstream call runs in a detached task, so cancelling the request
+        that started it (or any waiter) does not fail the others.
+        The SQLite tier is read and written on a worker thread.
+        """
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.create_task(self._alead(key, future, compute))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        # shield: cancelling wrap_future's result would cancel the shared Future
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def _alead(self, key: str, future: Future, compute):
+        try:
+            value = await run_in_threadpool(self._stored, key) if self.disk else self._stored(key)
+            if value is MISSING:
+                value = await compute()
+                if self.disk:
+                    await run_in_threadpool(self.disk.set, key, value, self.ttl)
+            self._settle(key, future, value)
+        except BaseException as e:          # delivered to every caller through `future`
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get(self, key: str):
+        """Cached value or None, without joining or starting an upstream call."""
+        value = self.memory.get(key)
+        if value is MISSING and self.disk:
+            value = self.disk.get(key)
+            if value is not MISSING:
+                self.memory.set(key, value)
+        return None if value is MISSING else value
+
+    def set(self, key: str, value):
+        self.memory.set(key, value)
+        if self.disk:
+            self.disk.set(key, value, self.ttl)
+
+    async def aget(self, key: str):
+        """get() for async callers: a memory miss reads SQLite on a worker thread."""
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        return await run_in_threadpool(self.get, key) if self.disk else None
+
+    async def aset(self, key: str, value):
+        """set() for async callers: the SQLite write runs on a worker thread."""
+        if self.disk:
+            await run_in_threadpool(self.set, key, value)
+        else:
+            self.memory.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "disk":           bool(self.disk),
+            "upstream_calls": self.upstream_calls,
+            "coalesced":      self.coalesced,
+        }
+
+llm_cache = LLMCache()
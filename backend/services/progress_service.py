@@ -0,0 +1,304 @@
+import os
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+from graph_engine.unlock_state import UnlockState
+from graph_engine.cohort import Cohort
+from graph_engine.ranking import rank_next
+from repositories.progress_repo import (
+    get_mastered, set_mastered, upsert_progress, iter_topic_progress,
+    get_mastery_bitmap, save_mastery_bitmap,
+    get_mastered_async, get_mastery_bitmap_async, save_mastery_bitmap_async
+)
+from database import async_connection
+from repositories.graph_repo import get_concept_topic_id
+from services.graph_cache import graph_cache
+from services.progress_writer import progress_writer, PROGRESS_WRITE_BEHIND
+from metrics import timed, graph_duration
+
+load_dotenv()
+
+PROGRESS_STATE_CACHE_SIZE = int(os.getenv("PROGRESS_STATE_CACHE_SIZE", 10000))
+PROGRESS_BITMAP           = os.getenv("PROGRESS_BITMAP", "0") == "1"   # needs migrations/002
+
+class ProgressStateStore:
+    """
+    LRU of UnlockState keyed by (user_id, topic_id).
+    An entry is rebuilt when its topic graph was recompiled (cache invalidation)
+    and whenever the learner reloads the topic, which also picks up writes made
+    through other worker processes.
+    """
+    def __init__(self, max_size: int = PROGRESS_STATE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()   # (user_id, topic_id) -> (CompiledGraph, UnlockState)
+        self._lock    = threading.Lock()
+        # Serialises load-and-write per (user, topic) so states and stored bitmaps follow write order
+        self._write_locks = [threading.RLock() for _ in range(64)]
+        # Writes per lock stripe; an async load that saw a write land mid-read is redone
+        self._writes      = [0] * len(self._write_locks)
+
+    def _stripe(self, user_id: int, topic_id: int) -> int:
+        return hash((user_id, topic_id)) % len(self._write_locks)
+
+    def _write_lock(self, user_id: int, topic_id: int):
+        return self._write_locks[self._stripe(user_id, topic_id)]
+
+    def _cached(self, user_id: int, topic_id: int, compiled):
+        with self._lock:
+            entry = self._entries.get((user_id, topic_id))
+            if entry is not None and entry[0] is compiled:
+                self._entries.move_to_end((user_id, topic_id))
+                return entry[1]
+        return None
+
+    def get(self, user_id: int, topic_id: int, conn=None, refresh: bool = False):
+        compiled = graph_cache.get(topic_id)
+        state = None if refresh else self._cached(user_id, topic_id, compiled)
+        if state is None:
+            with self._write_lock(user_id, topic_id):
+                mastered = _load_mastered(user_id, topic_id, compiled, conn=conn)
+                state = self._install(user_id, topic_id, compiled, mastered)
+        return compiled, state
+
+    async def aget(self, user_id: int, topic_id: int, refresh: bool = False):
+        """
+        get() for async routes: progress is read over the async pool and the
+        UnlockState is built on a worker thread. If a write to the same lock
+        stripe lands during the read, the read is redone.
+        """
+        compiled = await graph_cache.aget(topic_id)
+        state = None if refresh else self._cached(user_id, topic_id, compiled)
+        if state is not None:
+            return compiled, state
+        stripe = self._stripe(user_id, topic_id)
+        for _ in range(3):
+            writes   = self._writes[stripe]
+            mastered = await _load_mastered_async(user_id, topic_id, compiled)
+            state    = await run_in_threadpool(self._install, user_id, topic_id, compiled, mastered, writes)
+            if state is not None:
+                return compiled, state
+        return await run_in_threadpool(self.get, user_id, topic_id, None, True)
+
+    def _install(self, user_id: int, topic_id: int, compiled, mastered: set, writes: int = None):
+        """
+        Builds and caches the state from `mastered` plus buffered writes.
+        Returns None, caching nothing, if the stripe saw writes since `writes`.
+        """
+        with self._write_lock(user_id, topic_id):
+            if writes is not None and self._writes[self._stripe(user_id, topic_id)] != writes:
+                return None
+            for concept_id, is_mastered in progress_writer.pending_for(user_id).items():
+                if is_mastered:
+                    mastered.add(concept_id)
+                else:
+                    mastered.discard(concept_id)
+            with timed(graph_duration, "unlock_state", type(compiled.graph).__name__):
+                state = UnlockState(compiled.graph, mastered)
+            if compiled.graph.concepts:
+                with self._lock:
+                    self._entries[(user_id, topic_id)] = (compiled, state)
+                    self._entries.move_to_end((user_id, topic_id))
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+        return state
+
+    def _wrote(self, user_id: int, topic_id: int):
+        """Call with the write lock held, after persisting."""
+        self._writes[self._stripe(user_id, topic_id)] += 1
+
+    def toggle(self, user_id: int, concept_id: int, mastered: bool, topic_id: int = None, conn=None) -> dict:
+        if topic_id is None:
+            topic_id = get_concept_topic_id(concept_id, conn=conn)
+
+        if topic_id is None:
+            _persist(user_id, {concept_id: mastered}, conn=conn)
+            return {"topic_id": None, "unlocked_added": [], "unlocked_removed": [],
+                    "frontier_added": [], "frontier_removed": []}
+
+        with self._write_lock(user_id, topic_id):
+            # Load state before writing so the delta is relative to what the client last saw
+            compiled, state = self.get(user_id, topic_id, conn=conn)
+            changes = {concept_id: mastered}
+            _persist(user_id, changes, conn=conn, bitmap=_bitmap(topic_id, compiled, changes))
+            self._wrote(user_id, topic_id)
+            with self._lock:
+                delta = state.set_mastered(concept_id, mastered)
+        return {"topic_id": topic_id, **delta}
+
+    def toggle_many(self, user_id: int, topic_id: int, changes: list, conn=None) -> dict:
+        """
+        Applies many (concept_id, mastered) changes on one topic with a single write.
+        The last change per concept wins; concepts outside the topic are ignored.
+        Returns the net unlocked / frontier delta.
+        """
+        with self._write_lock(user_id, topic_id):
+            compiled, state = self.get(user_id, topic_id, conn=conn)
+            wanted, ignored = {}, []
+            for concept_id, mastered in changes:
+                if concept_id in compiled.graph.concepts:
+                    wanted[concept_id] = mastered
+                else:
+                    ignored.append(concept_id)
+
+            _persist(user_id, wanted, conn=conn, bitmap=_bitmap(topic_id, compiled, wanted))
+            self._wrote(user_id, topic_id)
+            with self._lock:
+                unlocked, frontier = set(state.unlocked), set(state.frontier)
+                for concept_id, mastered in wanted.items():
+                    state.set_mastered(concept_id, mastered)
+                return {
+                    "topic_id":         topic_id,
+                    "applied":          len(wanted),
+                    "ignored":          ignored,
+                    "unlocked_added":   sorted(state.unlocked - unlocked),
+                    "unlocked_removed": sorted(unlocked - state.unlocked),
+                    "frontier_added":   sorted(state.frontier - frontier),
+                    "frontier_removed": sorted(frontier - state.frontier),
+                }
+
+def _load_mastered(user_id: int, topic_id: int, compiled, conn=None) -> set:
+    """With PROGRESS_BITMAP, one-row bitmap fetch; rebuilt from user_progress when missing or stale."""
+    if not PROGRESS_BITMAP or not compiled.graph.concepts:
+        return set(get_mastered(user_id, topic_id, conn=conn))
+    codec  = compiled.mastery_bitmap
+    stored = get_mastery_bitmap(user_id, topic_id, conn=conn)
+    if stored is not None and stored[0] == codec.fingerprint:
+        return set(codec.decode(stored[1]))
+    mastered = set(get_mastered(user_id, topic_id, conn=conn))
+    save_mastery_bitmap(user_id, topic_id, codec.fingerprint, codec.encode(mastered), conn=conn)
+    return mastered
+
+async def _load_mastered_async(user_id: int, topic_id: int, compiled) -> set:
+    """_load_mastered over the async pool."""
+    if not PROGRESS_BITMAP or not compiled.graph.concepts:
+        return set(await get_mastered_async(user_id, topic_id))
+    codec = compiled.mastery_bitmap
+    async with async_connection() as conn:
+        stored = await get_mastery_bitmap_async(user_id, topic_id, conn=conn)
+        if stored is not None and stored[0] == codec.fingerprint:
+            return set(codec.decode(stored[1]))
+        mastered = set(await get_mastered_async(user_id, topic_id, conn=conn))
+        await save_mastery_bitmap_async(user_id, topic_id, codec.fingerprint, codec.encode(mastered), conn=conn)
+    return mastered
+
+def _bitmap(topic_id: int, compiled, changes: dict):
+    """
+    (topic_id, MasteryBitmap) naming the stored bitmap to update with `changes`,
+    or None when bitmaps are off. The bits come from the stored row inside the write.
+    """
+    if not PROGRESS_BITMAP or not changes:
+        return None
+    return (topic_id, compiled.mastery_bitmap)
+
+def _persist(user_id: int, changes: dict, conn=None, bitmap: tuple = None):
+    """Buffers the changes when write-behind is on, otherwise commits them before returning."""
+    if not changes:
+        return
+    if PROGRESS_WRITE_BEHIND:
+        progress_writer.submit(user_id, changes, bitmap)
+    elif len(changes) == 1 and bitmap is None:
+        [(concept_id, mastered)] = changes.items()
+        set_mastered(user_id, concept_id, mastered, conn=conn)
+    else:
+        upsert_progress([(user_id, c, m) for c, m in changes.items()], conn=conn,
+                        bitmaps=[(user_id, *bitmap)] if bitmap else ())
+
+progress_states = ProgressStateStore()
+
+async def load_progress_state(user_id: int, topic_id: int):
+    """Fresh read from MySQL; re-seeds the cached state for this learner and topic."""
+    return await progress_states.aget(user_id, topic_id, refresh=True)
+
+def toggle_mastered(user_id: int, concept_id: int, mastered: bool, topic_id: int = None, conn=None) -> dict:
+    return progress_states.toggle(user_id, concept_id, mastered, topic_id=topic_id, conn=conn)
+
+def toggle_mastered_many(user_id: int, topic_id: int, changes: list, conn=None) -> dict:
+    return progress_states.toggle_many(user_id, topic_id, changes, conn=conn)
+
+async def get_topic_state(user_id: int, topic_id: int) -> dict:
+    """Everything needed to render one topic for one learner: one graph load, one progress query."""
+    compiled, state = await load_progress_state(user_id, topic_id)
+    return await run_in_threadpool(_topic_state, topic_id, compiled, state)
+
+def _topic_state(topic_id: int, compiled, state) -> dict:
+    unlocked, frontier = state.unlocked, state.frontier
+
+    def node_state(i):
+        if i in state.mastered: return "mastered"
+        if i in unlocked:       return "unlocked"
+        if i in frontier:       return "frontier"
+        return "locked"
+
+    return {
+        "topic_id":      topic_id,
+        "learning_path": compiled.path,
+        "edges":         [{"from": f, "to": t} for f, t in compiled.edges],
+        "positions":     compiled.layout["positions"],
+        "mastered_ids":  sorted(state.mastered),
+        "unlocked":      state.get_unlocked(),
+        "frontier":      state.get_frontier(),
+        "node_states":   {i: node_state(i) for i in compiled.order},
+    }
+
+async def get_path_to(user_id: int, topic_id: int, concept_id: int) -> dict | None:
+    """Remaining concepts on the way to `concept_id` for this learner, or None if it is not in the topic."""
+    compiled, state = await progress_states.aget(user_id, topic_id)
+    if concept_id not in compiled.concepts:
+        return None
+    return await run_in_threadpool(_path_to, topic_id, concept_id, compiled, state)
+
+def _path_to(topic_id: int, concept_id: int, compiled, state) -> dict:
+    index = compiled.reachability
+    return {
+        "topic_id":      topic_id,
+        "target":        {"id": concept_id, "name": compiled.concepts[concept_id]},
+        "path":          compiled.named(index.path_to(concept_id, state.mastered)),
+        "unlocks_count": index.descendant_count(concept_id),
+    }
+
+async def get_next_concepts(user_id: int, topic_id: int, limit: int = 5) -> dict | None:
+    """Concepts the learner can start now, ranked by what they unlock; no LLM involved. None for unknown topics."""
+    compiled, state = await progress_states.aget(user_id, topic_id)
+    if not compiled.concepts:
+        return None
+    return await run_in_threadpool(_next_concepts, topic_id, compiled, state, limit)
+
+def _next_concepts(topic_id: int, compiled, state, limit: int) -> dict:
+    with timed(graph_duration, "rank_next", type(compiled.graph).__name__):
+        ranked = rank_next(state, compiled.reachability, compiled.difficulty, limit=limit)
+    for candidate in ranked:
+        candidate["name"]      = compiled.concepts[candidate["id"]]
+        candidate["completes"] = compiled.named(candidate["completes"])
+    return {"topic_id": topic_id, "next": ranked}
+
+def get_cohort_report(topic_id: int, include_users: bool = False, conn=None) -> dict:
+    """Unlocked / frontier / progress for every learner on a topic from one streaming query."""
+    compiled = graph_cache.get(topic_id)
+    cohort = Cohort(compiled.graph)
+    for user_id, concept_id, mastered in iter_topic_progress(topic_id, conn=conn):
+        cohort.add(user_id, concept_id, mastered)
+
+    with timed(graph_duration, "cohort", type(compiled.graph).__name__):
+        hist = cohort.histogram()
+    progress = cohort.progress()
+    buckets = [0] * 11                      # 0-9%, 10-19%, ... 90-99%, 100%
+    for pct in progress.values():
+        buckets[int(pct // 10)] += 1
+
+    # Learning order first; concepts on a cycle have no place in it but are still reported
+    in_order = set(compiled.order)
+    ordered  = compiled.order + [i for i in compiled.concepts if i not in in_order]
+    report = {
+        "topic_id": topic_id,
+        "learners": len(cohort.user_ids),
+        "concepts": [{"id": i, "name": compiled.concepts[i], **hist[i]} for i in ordered],
+        "progress_histogram": [{"from": 10 * b, "to": min(10 * b + 9, 100), "learners": n}
+                               for b, n in enumerate(buckets)],
+    }
+    if include_users:
+        per_user = cohort.per_user()
+        report["users"] = [{"user_id": uid, "progress": progress[uid], **per_user[uid]}
+                           for uid in sorted(cohort.user_ids)]
+    return report
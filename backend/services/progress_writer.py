@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+
+from repositories.progress_repo import upsert_progress
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_WRITE_BEHIND       = os.getenv("PROGRESS_WRITE_BEHIND", "0") == "1"
+PROGRESS_FLUSH_INTERVAL     = float(os.getenv("PROGRESS_FLUSH_INTERVAL", 1.0))   # seconds
+PROGRESS_FLUSH_MAX_PENDING  = int(os.getenv("PROGRESS_FLUSH_MAX_PENDING", 1000))
+PROGRESS_FLUSH_ON_SHUTDOWN  = os.getenv("PROGRESS_FLUSH_ON_SHUTDOWN", "1") == "1"
+
+class ProgressWriter:
+    """
+    Write-behind buffer for progress toggles. Changes are acknowledged once
+    buffered and written every `interval` seconds (or as soon as `max_pending`
+    rows are waiting) with one multi-row upsert. Repeated toggles of the same
+    concept in between collapse to the latest value.
+
+    Durability: buffered changes are lost if the process dies before a flush,
+    and are only visible to this process until then. A failed flush keeps its
+    rows (unless superseded) and retries on the next tick.
+    """
+    def __init__(self, interval: float = PROGRESS_FLUSH_INTERVAL, max_pending: int = PROGRESS_FLUSH_MAX_PENDING,
+                 writer=upsert_progress):
+        self.interval    = interval
+        self.max_pending = max_pending
+        self._write      = writer
+        self._pending    = {}               # user_id -> {concept_id: mastered}
+        self._inflight   = {}               # the batch being written; still visible to readers
+        self._bitmaps    = {}               # (user_id, topic_id) -> MasteryBitmap to update, latest wins
+        self._size       = 0
+        self._lock       = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake       = threading.Event()
+        self._stopped    = threading.Event()
+        self._thread     = None
+        self.flushes      = 0
+        self.flushed_rows = 0
+        self.coalesced    = 0
+        self.failures     = 0
+
+    def submit(self, user_id: int, changes: dict, bitmap: tuple = None):
+        """Buffers {concept_id: mastered} for a user, plus an optional (topic_id, MasteryBitmap) to keep in step."""
+        with self._lock:
+            if bitmap is not None:
+                topic_id, codec = bitmap
+                self._bitmaps[user_id, topic_id] = codec
+            mine = self._pending.setdefault(user_id, {})
+            for concept_id, mastered in changes.items():
+                if concept_id in mine:
+                    self.coalesced += 1
+                else:
+                    self._size += 1
+                mine[concept_id] = mastered
+            full = self._size >= self.max_pending
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def pending_for(self, user_id: int) -> dict:
+        """Unflushed {concept_id: mastered} for a user, to overlay on reads from MySQL."""
+        with self._lock:
+            return {**self._inflight.get(user_id, {}), **self._pending.get(user_id, {})}
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Progress flush failed; will retry")
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._size = self._pending, {}, 0
+                bitmaps, self._bitmaps = self._bitmaps, {}
+                self._inflight = batch
+            rows = [(u, c, m) for u, changes in batch.items() for c, m in changes.items()]
+            if not rows:
+                return 0
+            try:
+                self._write(rows, bitmaps=[(u, t, codec) for (u, t), codec in bitmaps.items()])
+            except Exception:
+                with self._lock:
+                    self._inflight = {}
+                    self.failures += 1
+                    for key, codec in bitmaps.items():
+                        self._bitmaps.setdefault(key, codec)
+                    for u, changes in batch.items():
+                        mine = self._pending.setdefault(u, {})
+                        for c, m in changes.items():
+                            if c not in mine:        # newer toggles win over the failed ones
+                                mine[c] = m
+                                self._size += 1
+                raise
+            with self._lock:
+                self._inflight     = {}
+                self.flushes      += 1
+                self.flushed_rows += len(rows)
+            return len(rows)
+
+    def stop(self, flush: bool = PROGRESS_FLUSH_ON_SHUTDOWN):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        if flush:
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending":      self._size,
+                "flushes":      self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "coalesced":    self.coalesced,
+                "failures":     self.failures,
+            }
+
+progress_writer = ProgressWriter()
@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from services.ai_service import generate_quiz, generate_quiz_async
+from services.ttl_cache import TTLCache, MISSING
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+QUIZ_POOL_SIZE            = int(os.getenv("QUIZ_POOL_SIZE", 10))          # questions kept per concept
+QUIZ_POOL_REFILL_AT       = int(os.getenv("QUIZ_POOL_REFILL_AT", 3))      # refill when fewer unseen remain
+QUIZ_POOL_CONCEPTS        = int(os.getenv("QUIZ_POOL_CONCEPTS", 2000))    # concepts with a pool, LRU
+QUIZ_PREFETCH_WORKERS     = int(os.getenv("QUIZ_PREFETCH_WORKERS", 2))
+QUIZ_PREFETCH_MAX_PENDING = int(os.getenv("QUIZ_PREFETCH_MAX_PENDING", 100))
+QUIZ_PREFETCH_PER_REQUEST = int(os.getenv("QUIZ_PREFETCH_PER_REQUEST", 5))    # refills one prefetch call may queue
+QUIZ_SEEN_TTL             = int(os.getenv("QUIZ_SEEN_TTL", 7 * 86400))    # seconds a served question stays hidden
+QUIZ_AVOID_MAX            = int(os.getenv("QUIZ_AVOID_MAX", 20))          # questions the live prompt lists to avoid
+
+def _key(concept_name: str) -> str:
+    return " ".join(concept_name.split()).casefold()
+
+class QuizPool:
+    """
+    Pre-generated quiz questions per concept, shared by all learners.
+
+    Each concept keeps up to `size` questions (oldest dropped first). Questions
+    served to a signed-in learner are remembered for QUIZ_SEEN_TTL seconds and
+    not shown to them again. A background refill is queued whenever fewer than
+    `refill_at` questions remain that the learner has not seen, or when a
+    concept is prefetched. A refill generates at most `refill_at` questions, so
+    the pool stays only that far ahead of demand. One prefetch call queues at
+    most `per_request` refills. Refills run on `workers` threads, at most one
+    per concept and `max_pending` overall; beyond that prefetch requests are dropped.
+
+    Pooled questions are generated without learner-specific context; only the
+    live fallback uses the learner's mastered concepts.
+    """
+    def __init__(self, size: int = QUIZ_POOL_SIZE, refill_at: int = QUIZ_POOL_REFILL_AT,
+                 max_concepts: int = QUIZ_POOL_CONCEPTS, workers: int = QUIZ_PREFETCH_WORKERS,
+                 max_pending: int = QUIZ_PREFETCH_MAX_PENDING, per_request: int = QUIZ_PREFETCH_PER_REQUEST,
+                 avoid_max: int = QUIZ_AVOID_MAX, generator=generate_quiz, async_generator=generate_quiz_async):
+        self.size         = size
+        self.avoid_max    = avoid_max
+        self.refill_at    = refill_at
+        self.max_concepts = max_concepts
+        self.max_pending  = max_pending
+        self.per_request  = per_request
+        self._generate    = generator
+        self._agenerate   = async_generator
+        self._pools       = OrderedDict()     # key -> deque of questions
+        self._refilling   = set()             # keys with a queued or running refill
+        self._seen        = TTLCache(100000, QUIZ_SEEN_TTL)   # user_id -> {key: {question text}}
+        self._lock        = threading.Lock()
+        self._executor    = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quiz-prefetch")
+        self.served_pooled = 0
+        self.served_live   = 0
+        self.generated     = 0
+        self.dropped       = 0
+        self.failures      = 0
+
+    def _seen_by(self, user_id, key: str) -> set:
+        if user_id is None:
+            return set()
+        seen = self._seen.get(user_id)
+        if seen is MISSING:
+            seen = {}
+            self._seen.set(user_id, seen)
+        return seen.setdefault(key, set())
+
+    def take(self, concept_name: str, user_id: int = None, exclude=()) -> dict | None:
+        """A pooled question the learner has not seen (nor listed in `exclude`), or None."""
+        key = _key(concept_name)
+        with self._lock:
+            seen = self._seen_by(user_id, key)
+            hidden = seen | set(exclude)
+            pool = self._pools.get(key, ())
+            unseen = [q for q in pool if q["question"] not in hidden]
+            question = unseen[0] if unseen else None
+            if question is not None:
+                seen.add(question["question"])
+                self._pools.move_to_end(key)
+                self.served_pooled += 1
+        if len(unseen) - (question is not None) < self.refill_at:
+            self.prefetch([concept_name], force=True)
+        return question
+
+    async def serve_async(self, concept_name: str, mastered_names: list[str], user_id: int = None, exclude=()) -> dict:
+        """
+        A pooled question when one is available, otherwise one generated live
+        (on the async client) for this learner and pooled for others. Signed-in
+        learners are tracked server-side, so `exclude` only applies to anonymous
+        callers. The live prompt lists at most `avoid_max` questions to avoid.
+        Refills still run on the prefetch threads.
+        """
+        if user_id is not None:
+            exclude = ()
+        question = self.take(concept_name, user_id=user_id, exclude=exclude)
+        if question is not None:
+            return question
+        question = await self._agenerate(concept_name, mastered_names, self._avoid(concept_name, exclude))
+        self._served_live(concept_name, question, user_id)
+        return question
+
+    def _avoid(self, concept_name: str, exclude) -> list:
+        """The newest pooled questions, then the newest of `exclude`, up to `avoid_max` in all."""
+        with self._lock:
+            previous = [q["question"] for q in self._pools.get(_key(concept_name), ())]
+        avoid = previous[::-1] + [q for q in reversed(exclude) if q not in previous]
+        return avoid[:self.avoid_max]
+
+    def _served_live(self, concept_name: str, question: dict, user_id):
+        with self._lock:
+            self.served_live += 1
+        self.add(concept_name, question, user_id=user_id)
+
+    def add(self, concept_name: str, question: dict, user_id: int = None):
+        """Pools a question (e.g. one generated live) and marks it seen by `user_id`."""
+        if not question.get("question"):
+            return
+        key = _key(concept_name)
+        with self._lock:
+            self._store(key, [question])
+            self._seen_by(user_id, key).add(question["question"])
+
+    def _store(self, key: str, questions: list):
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = deque(maxlen=self.size)
+        known = {q["question"] for q in pool}
+        for q in questions:
+            if q.get("question") and q["question"] not in known:
+                pool.append(q)
+                known.add(q["question"])
+        self._pools.move_to_end(key)
+        while len(self._pools) > self.max_concepts:
+            self._pools.popitem(last=False)
+
+    def prefetch(self, concept_names, force: bool = False):
+        """
+        Queues refills for concepts whose pool is below `refill_at` (any not-full
+        pool with `force`), in the order given, up to `per_request` of them.
+        """
+        queued = 0
+        for name in concept_names:
+            if queued >= self.per_request:
+                break
+            key = _key(name)
+            with self._lock:
+                have = len(self._pools.get(key, ()))
+                if key in self._refilling or have >= self.size or (have >= self.refill_at and not force):
+                    continue
+                if len(self._refilling) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._refilling.add(key)
+            queued += 1
+            self._executor.submit(self._refill, key, name, min(self.refill_at, self.size - have))
+
+    def _refill(self, key: str, concept_name: str, count: int):
+        """Generates up to `count` questions one at a time; each sees the pool so far as `previous_questions`."""
+        try:
+            for _ in range(count):
+                with self._lock:
+                    pool = self._pools.get(key, ())
+                    if len(pool) >= self.size:
+                        return
+                    previous = [q["question"] for q in pool]
+                question = self._generate(concept_name, [], previous)
+                with self._lock:
+                    self.generated += 1
+                    before = len(self._pools.get(key, ()))
+                    self._store(key, [question])
+                    if len(self._pools[key]) == before:      # duplicate or unparsable: stop, retry next time
+                        return
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            logger.exception("Quiz prefetch failed for %r", concept_name)
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "concepts":      len(self._pools),
+                "questions":     sum(len(p) for p in self._pools.values()),
+                "refilling":     len(self._refilling),
+                "served_pooled": self.served_pooled,
+                "served_live":   self.served_live,
+                "generated":     self.generated,
+                "dropped":       self.dropped,
+                "failures":      self.failures,
+            }
+
+quiz_pool = QuizPool()
+
+async def serve_quiz_async(concept_name: str, mastered_names: list[str], previous_questions: list[str] = [],
+                           user_id: int = None) -> dict:
+    return await quiz_pool.serve_async(concept_name, mastered_names, user_id=user_id, exclude=previous_questions)
@@ -0,0 +1,96 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+from graph_engine.dag import ConceptGraph
+from graph_engine.feedback import feedback_edges
+from repositories.topic_repo import save_generated_topic
+from services.ai_service import generate_roadmap
+from services.graph_service import invalidate_topic
+from services.job_queue import JobQueue, JobFailed
+
+load_dotenv()
+
+ROADMAP_WORKERS       = int(os.getenv("ROADMAP_WORKERS", 2))
+ROADMAP_MAX_PENDING   = int(os.getenv("ROADMAP_MAX_PENDING", 50))
+ROADMAP_JOB_RETENTION = int(os.getenv("ROADMAP_JOB_RETENTION", 3600))   # seconds
+ROADMAP_CANDIDATES    = max(1, int(os.getenv("ROADMAP_CANDIDATES", 3)))   # concurrent LLM attempts per job
+
+roadmap_jobs = JobQueue("roadmap", ROADMAP_WORKERS, ROADMAP_MAX_PENDING, ROADMAP_JOB_RETENTION)
+_candidates  = ThreadPoolExecutor(max_workers=ROADMAP_WORKERS * ROADMAP_CANDIDATES, thread_name_prefix="roadmap-llm")
+
+def normalize_topic(topic: str) -> str:
+    """Dedupe key: case- and whitespace-insensitive."""
+    return " ".join(topic.split()).casefold()
+
+def _graph(data: dict) -> tuple:
+    """(concepts, edges) of a generated roadmap; raises on a malformed structure."""
+    concepts = {c["id"]: c["name"] for c in data["concepts"]}
+    edges    = [(d["from"], d["to"]) for d in data["dependencies"]]
+    if "topic" not in data or "description" not in data:          # needed to save it
+        raise ValueError("Generated roadmap is missing its topic or description")
+    if not concepts:
+        raise ValueError("Generated roadmap has no concepts")
+    return concepts, edges
+
+def generate_valid_roadmap(topic: str) -> tuple:
+    """
+    Fires ROADMAP_CANDIDATES generations at once and returns (data, removed_edges)
+    for the first one that parses and is a DAG. If every candidate has a cycle,
+    the one needing the fewest removals is repaired by dropping a minimal
+    feedback edge set. Calls still in flight finish in the background and are discarded.
+    """
+    futures = [_candidates.submit(generate_roadmap, topic) for _ in range(ROADMAP_CANDIDATES)]
+    best, error = None, None
+    try:
+        for future in as_completed(futures):
+            try:
+                data = future.result()
+                concepts, edges = _graph(data)
+            except Exception as e:              # LLM error, bad JSON, missing fields
+                error = e
+                continue
+            if ConceptGraph(concepts, edges).is_valid_dag():
+                return data, []
+            removed = feedback_edges(concepts, edges)
+            if best is None or len(removed) < len(best[1]):
+                best = (data, removed)
+    finally:
+        for future in futures:
+            future.cancel()
+
+    if best is None:
+        raise JobFailed(f"AI generation failed: {str(error)}")
+    data, removed = best
+    dropped = set(removed)
+    data["dependencies"] = [d for d in data["dependencies"] if (d["from"], d["to"]) not in dropped]
+    return data, removed
+
+def create_roadmap(topic: str) -> dict:
+    """Generates, validates (repairing cycles) and saves a roadmap. Runs on a roadmap_jobs worker."""
+    data, removed = generate_valid_roadmap(topic)
+    concepts = {c["id"]: c["name"] for c in data["concepts"]}
+
+    topic_id = save_generated_topic(
+        data["topic"],
+        data["description"],
+        data["concepts"],
+        data["dependencies"]
+    )
+    invalidate_topic(topic_id)
+
+    return {
+        "topic_id":    topic_id,
+        "topic_name":  data["topic"],
+        "concept_count": len(data["concepts"]),
+        "edge_count":    len(data["dependencies"]),
+        "is_valid_dag":  True,
+        "removed_edges": [{"from": concepts[f], "to": concepts[t]} for f, t in removed],
+    }
+
+def submit_roadmap(topic: str):
+    return roadmap_jobs.submit(normalize_topic(topic), create_roadmap, topic)
+
+def shutdown_roadmaps():
+    roadmap_jobs.shutdown()
+    _candidates.shutdown(wait=False, cancel_futures=True)
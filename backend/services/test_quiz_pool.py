@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.quiz_pool import QuizPool
+
+def generator(gate: threading.Event = None):
+    """Fake generate_quiz: numbered questions, optionally blocked until `gate` is set."""
+    lock, count = threading.Lock(), [0]
+    def generate(concept_name, mastered_names, previous_questions):
+        if gate is not None:
+            gate.wait()
+        with lock:
+            count[0] += 1
+            n = count[0]
+        return {"question": f"{concept_name} #{n}", "options": {}, "answer": "A", "explanation": ""}
+    return generate
+
+def wait_idle(pool: QuizPool, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while pool.stats()["refilling"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not pool.stats()["refilling"], "Refills did not finish"
+
+print("Running quiz pool tests...\n")
+
+# Prefetch fills only `refill_at` ahead of demand
+pool = QuizPool(size=6, refill_at=2, workers=2, generator=generator())
+pool.prefetch(["Stacks"])
+wait_idle(pool)
+assert pool.stats()["questions"] == 2 and pool.stats()["generated"] == 2, "Prefetch generates refill_at questions"
+pool.prefetch(["Stacks"])
+wait_idle(pool)
+assert pool.stats()["generated"] == 2, "A pool at refill_at is not prefetched again"
+print("Prefetch depth works")
+
+# Taking questions triggers refills; a learner never sees a question twice
+seen = set()
+for _ in range(5):
+    q = pool.take("Stacks", user_id=1)
+    if q is None:
+        wait_idle(pool)
+        q = pool.take("Stacks", user_id=1)
+    assert q is not None and q["question"] not in seen, "No repeats for one learner"
+    seen.add(q["question"])
+    wait_idle(pool)
+assert pool.stats()["generated"] > 2, "Falling below refill_at queues a refill"
+assert pool.take(" stacks", user_id=2) is not None, "Other learners share the pool; names are normalised"
+assert pool.take("Stacks", exclude=[q["question"] for q in pool._pools["stacks"]]) is None, "Excluded questions are hidden"
+pool.shutdown()
+print("Refill and no-repeat work")
+
+# Live fallback is pooled and marked seen
+async def live(concept_name, mastered_names, previous_questions):
+    return {"question": f"{concept_name} live", "options": {}, "answer": "A", "explanation": ""}
+
+pool = QuizPool(size=4, refill_at=0, generator=generator(), async_generator=live)
+q = asyncio.run(pool.serve_async("Queues", [], user_id=7))
+assert pool.stats()["served_live"] == 1 and pool.take("Queues", user_id=7) is None, "Live question is not served again"
+assert pool.take("Queues", user_id=8)["question"] == q["question"], "Live question is pooled for others"
+pool.shutdown()
+print("Live fallback works")
+
+# The live prompt's avoid list is capped; signed-in learners' client lists are ignored
+prompts = []
+async def recording(concept_name, mastered_names, previous_questions):
+    prompts.append(previous_questions)
+    return {"question": f"{concept_name} live {len(prompts)}", "options": {}, "answer": "A", "explanation": ""}
+
+pool = QuizPool(size=4, refill_at=0, avoid_max=5, generator=generator(), async_generator=recording)
+for i in range(3):
+    pool.add("Heaps", {"question": f"pooled {i}"})
+history = [f"old {i}" for i in range(100)]
+asyncio.run(pool.serve_async("Heaps", [], exclude=history + [f"pooled {i}" for i in range(3)]))
+assert prompts[-1] == ["pooled 2", "pooled 1", "pooled 0", "old 99", "old 98"], "Newest first, capped at avoid_max"
+q = asyncio.run(pool.serve_async("Heaps", [], user_id=3, exclude=[f"pooled {i}" for i in range(4)]))
+assert q["question"] == "pooled 0" and pool.stats()["served_live"] == 1, "Client exclude list ignored when signed in"
+pool.shutdown()
+print("Avoid list is bounded")
+
+# One prefetch call queues at most `per_request` refills; beyond `max_pending` they are dropped
+gate = threading.Event()
+pool = QuizPool(size=4, refill_at=1, workers=1, max_pending=2, per_request=3, generator=generator(gate))
+pool.prefetch([f"Concept {i}" for i in range(10)])
+assert pool.stats()["refilling"] == 2 and pool.stats()["dropped"] == 8, "max_pending caps queued refills"
+gate.set()
+wait_idle(pool)
+pool.per_request, pool.max_pending = 3, 100
+pool.prefetch([f"Concept {i}" for i in range(10)])
+assert pool.stats()["refilling"] <= 3, "per_request caps one prefetch call"
+wait_idle(pool)
+assert pool.stats()["concepts"] == 5 and pool.stats()["generated"] == 5, "Each refill stops at refill_at"
+pool.shutdown()
+print("Prefetch limits work")
+
+print("\nAll quiz pool tests passed")
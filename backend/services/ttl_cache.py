@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after they are set."""
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl      = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock    = threading.Lock()
+        self.hits     = 0
+        self.misses   = 0
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard_where(self, predicate) -> int:
+        """Drops every entry whose (key, value) matches; returns how many were dropped."""
+        with self._lock:
+            doomed = [k for k, (_, v) in self._entries.items() if predicate(k, v)]
+            for k in doomed:
+                del self._entries[k]
+            return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size":     len(self._entries),
+                "max_size": self.max_size,
+                "ttl":      self.ttl,
+                "hits":     self.hits,
+                "misses":   self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
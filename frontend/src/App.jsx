@@ -152,6 +152,11 @@ function buildHierarchicalLayout(path, edges) {
     })
   }
 
+  return buildNodes(path, positions)
+}
+
+// positions: { [conceptId]: { x, y } } — from the server (/topics/{id}/state) or the fallback above
+function buildNodes(path, positions) {
   return path.map(c => ({
     id: String(c.id),
     position: positions[c.id] ?? { x: 0, y: 0 },
@@ -352,8 +357,14 @@ function GenerateModal({ onClose, onGenerated, api }) {
   const run = () => {
     if (!input.trim() || loading) return
     setLoading(true); setError(''); setResult(null)
+    // Generation runs as a background job — long-poll until it finishes
+    const poll = job => {
+      if (job.status === 'done')   { setResult(job.result); setLoading(false); return }
+      if (job.status === 'failed') { setError(job.error ?? 'Generation failed — please try again.'); setLoading(false); return }
+      return api.get(`/roadmap/jobs/${job.job_id}`, { params: { wait: 25 } }).then(r => poll(r.data))
+    }
     api.post('/roadmap/generate', { topic: input.trim() })
-      .then(r => { setResult(r.data); setLoading(false) })
+      .then(r => poll(r.data))
       .catch(e => {
         setError(e.response?.data?.detail ?? 'Generation failed — please try again.')
         setLoading(false)
@@ -512,7 +523,7 @@ function GenerateModal({ onClose, onGenerated, api }) {
 // ─────────────────────────────────────────────────────────────
 // TOPIC DROPDOWN
 // ─────────────────────────────────────────────────────────────
-function TopicDropdown({ topics, currentId, onSwitch, onOpenGenerate }) {
+function TopicDropdown({ topics, currentId, onSwitch, onOpenGenerate, hasMore, onLoadMore }) {
   const [open, setOpen] = useState(false)
   const ref = useRef(null)
   const current = topics.find(t => t.id === currentId)
@@ -571,6 +582,16 @@ function TopicDropdown({ topics, currentId, onSwitch, onOpenGenerate }) {
                 {t.name}
               </button>
             ))}
+            {hasMore && (
+              <button onClick={onLoadMore} style={{
+                width: '100%', textAlign: 'left', padding: '9px 12px',
+                background: 'transparent', border: '1px solid transparent',
+                borderRadius: 5, color: T.tx2,
+                fontSize: 11, fontFamily: MONO, cursor: 'pointer',
+              }}>
+                Load more…
+              </button>
+            )}
           </div>
           <div style={{ borderTop: `1px solid ${T.line2}`, padding: '6px' }}>
             <button onClick={() => { onOpenGenerate(); setOpen(false) }} style={{
@@ -609,9 +630,9 @@ function ChatThread({ history, loading, input, onInput, onSend }) {
           {history.map((msg, i) => (
             <div key={i} style={{
               padding: '8px 11px', borderRadius: 6,
-              background: msg.role === 'user' ? T.blD : T.bg1,
-              border: `1px solid ${msg.role === 'user' ? T.blL : T.line1}`,
-              fontSize: 11, color: msg.role === 'user' ? T.bl : T.tx1,
+              background: msg.role === 'user' ? T.blD : msg.role === 'error' ? T.rdD : T.bg1,
+              border: `1px solid ${msg.role === 'user' ? T.blL : msg.role === 'error' ? T.rdL : T.line1}`,
+              fontSize: 11, color: msg.role === 'user' ? T.bl : msg.role === 'error' ? T.rd : T.tx1,
               lineHeight: 1.75,
               alignSelf: msg.role === 'user' ? 'flex-end' : 'flex-start',
               maxWidth: '90%',
@@ -679,9 +700,11 @@ export default function App() {
   const [unlocked,     setUnlocked]     = useState([])
   const [frontier,     setFrontier]     = useState([])
   const [graphLoading, setGraphLoading] = useState(true)
+  const skipRefresh = useRef(false)   // topic state already carries unlocked/frontier
 
   // Topics
   const [topics,         setTopics]        = useState([])
+  const [topicsCursor,   setTopicsCursor]  = useState(null)
   const [currentTopicId, setCurrentTopicId]= useState(null)
 
   // Panel
@@ -710,6 +733,7 @@ export default function App() {
   const [chatHistory,    setChatHistory]    = useState([])
   const [chatInput,      setChatInput]      = useState('')
   const [chatLoading,    setChatLoading]    = useState(false)
+  const [chatSession,    setChatSession]    = useState(null)
 
   // AI — Quiz
   const [quizData,      setQuizData]      = useState(null)
@@ -748,28 +772,39 @@ export default function App() {
     API.get('/roadmap/').then(r => {
       const t = r.data.topics
       setTopics(t)
+      setTopicsCursor(r.data.next_cursor)
       return t
     }), [API])
 
+  // The list is paginated newest first; older topics are fetched on demand
+  const loadMoreTopics = () => {
+    if (!topicsCursor) return
+    API.get('/roadmap/', { params: { cursor: topicsCursor } }).then(r => {
+      setTopics(t => [...t, ...r.data.topics])
+      setTopicsCursor(r.data.next_cursor)
+    })
+  }
+
   const loadTopic = useCallback(topicId => {
     setGraphLoading(true)
     setSelectedId(null); setConceptDetail(null)
     setMastered([]); setUnlocked([]); setFrontier([])
     setCurrentTopicId(topicId)
 
-    return Promise.all([
-      API.get(`/topics/${topicId}/path`),
-      API.get(`/topics/${topicId}/edges`),
-      API.get(`/progress/${topicId}`),        // AUTH CHANGE 4c: load saved progress
-    ]).then(([pr, er, pgr]) => {
-      const path     = pr.data.learning_path
-      const edgeList = er.data.edges
+    // Path, edges, saved progress and unlocked/frontier in one round trip
+    return API.get(`/topics/${topicId}/state`).then(r => {
+      const { learning_path: path, edges: edgeList } = r.data
+      skipRefresh.current = true
       setLearningPath(path)
       setRawEdges(edgeList)
-      setNodes(buildHierarchicalLayout(path, edgeList))
+      // Layout is precomputed server-side once per topic version
+      setNodes(r.data.positions ? buildNodes(path, r.data.positions) : buildHierarchicalLayout(path, edgeList))
       setEdges(makeEdges(edgeList))
-      setMastered(pgr.data.mastered_ids)      // AUTH CHANGE 4d: restore saved progress
+      setMastered(r.data.mastered_ids)
+      setUnlocked(r.data.unlocked)
+      setFrontier(r.data.frontier)
       setGraphLoading(false)
+      localStorage.setItem('cg_last_topic', topicId)
     })
   }, [API])
 
@@ -777,9 +812,10 @@ export default function App() {
   useEffect(() => {
     loadTopics().then(t => {
       if (t.length > 0) {
-        // Load the oldest created topic first (the user's original DSA topic)
-        const first = [...t].sort((a, b) => a.id - b.id)[0]
-        loadTopic(first.id)
+        // Reopen the last topic viewed here (it may be past the first page); otherwise the newest
+        const last = Number(localStorage.getItem('cg_last_topic'))
+        if (last) loadTopic(last).catch(() => loadTopic(t[0].id))
+        else loadTopic(t[0].id)
       } else {
         setGraphLoading(false)
         setShowGenerate(true)
@@ -801,6 +837,7 @@ export default function App() {
   }, [API, currentTopicId])
 
   useEffect(() => {
+    if (skipRefresh.current) { skipRefresh.current = false; return }
     if (learningPath.length > 0) refreshProgress(mastered)
   }, [mastered, learningPath])
 
@@ -821,6 +858,7 @@ export default function App() {
     // Reset AI state for new concept
     setExplanation('')
     setChatHistory([])
+    setChatSession(null)
     setChatInput('')
     setQuizData(null)
     setQuizAnswer(null)
@@ -862,7 +900,7 @@ export default function App() {
 
   const runExplain = () => {
     if (!conceptDetail) return
-    setExplainLoading(true); setExplanation(''); setChatHistory([])
+    setExplainLoading(true); setExplanation(''); setChatHistory([]); setChatSession(null)
     API.post('/ai/explain', {
       concept_name:        conceptDetail.name,
       concept_description: conceptDetail.description ?? '',
@@ -875,10 +913,11 @@ export default function App() {
     const prevQ = reset ? [] : (quizData?.question ? [...prevQuestions, quizData.question] : prevQuestions)
     setPrevQuestions(reset ? [] : prevQ)
     setQuizLoading(true); setQuizData(null); setQuizAnswer(null)
+    // Signed-in learners' seen questions are tracked by the server; only anonymous use sends recent ones
     API.post('/ai/quiz', {
-      concept_name:       conceptDetail.name,
-      mastered_names:     mastered.map(getName),
-      previous_questions: prevQ,
+      concept_name:   conceptDetail.name,
+      mastered_names: mastered.map(getName),
+      ...(user ? {} : { previous_questions: prevQ.slice(-20) }),
     }).then(r => { setQuizData(r.data); setQuizLoading(false) })
   }
 
@@ -887,16 +926,31 @@ export default function App() {
     const userMsg    = { role: 'user', content: chatInput.trim() }
     const newHistory = [...chatHistory, userMsg]
     setChatHistory(newHistory); setChatInput(''); setChatLoading(true)
-    API.post('/ai/chat', {
+    // The server keeps the conversation; follow-ups send only the question
+    const newSession = () => API.post('/ai/chat/sessions', {
       concept_name:   conceptDetail.name,
       explanation,
-      question:       userMsg.content,
       mastered_names: mastered.map(getName),
-      history:        chatHistory,
-    }).then(r => {
-      setChatHistory(h => [...h, { role: 'assistant', content: r.data.answer }])
-      setChatLoading(false)
-    })
+    }).then(r => { setChatSession(r.data.session_id); return r.data.session_id })
+    const ask = id => API.post(`/ai/chat/sessions/${id}`, { question: userMsg.content })
+    const answer = chatSession
+      ? ask(chatSession).catch(e => {
+          if (e.response?.status !== 404) throw e
+          return newSession().then(ask)      // session expired on the server: start a new one and retry
+        })
+      : newSession().then(ask)
+    answer
+      .then(r => {
+        setChatHistory(h => [...h, { role: 'assistant', content: r.data.answer }])
+        setChatLoading(false)
+      })
+      .catch(e => {
+        const detail = e.response?.data?.detail
+        setChatHistory(h => [...h, {
+          role: 'error', content: typeof detail === 'string' ? detail : 'No answer — please try again.',
+        }])
+        setChatLoading(false)
+      })
   }
 
   const handleGenerated = (topicId) => {
@@ -1020,6 +1074,8 @@ export default function App() {
               currentId={currentTopicId}
               onSwitch={loadTopic}
               onOpenGenerate={() => setShowGenerate(true)}
+              hasMore={!!topicsCursor}
+              onLoadMore={loadMoreTopics}
             />
           </div>
           <div style={{ flex: 1 }} />